@@ -0,0 +1,191 @@
+import os
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+PRICE_FIELDS = ("Current_Price", "Minimum_Price", "Maximum_Price")
+
+# mean, median or trimmed_mean
+STATISTIC = os.getenv("SCRAPER_AGGREGATE", "mean")
+# Fraction cut from each end of a group by trimmed_mean
+TRIM = float(os.getenv("SCRAPER_AGGREGATE_TRIM", "0.1"))
+# Modified z-score (0.6745 * |x - median| / MAD) above which a price is an
+# outlier, computed on log prices so a wrong unit (per kg, per tonne) stands
+# out however prices move; 0 turns rejection off
+OUTLIER_THRESHOLD = float(os.getenv("SCRAPER_OUTLIER_MAD", "3.5"))
+# Groups smaller than this have no meaningful MAD and are left alone
+OUTLIER_MIN_SAMPLES = 5
+# Floor for the log-price MAD, so tightly clustered groups do not turn the
+# ordinary spread between markets into outliers; at 3.5 nothing within ~3.7x
+# of the median is ever rejected, which is roughly where the old 5500 cap sat
+MIN_LOG_MAD = 0.25
+
+
+def parse_prices(texts):
+    # "₹ 1,250.00 / Quintal" -> 1250.0 for a whole column at once
+    extracted = pd.Series(texts, dtype="object").astype(str).str.extract(r"([\d,.]+)", expand=False)
+    return pd.to_numeric(extracted.str.replace(",", "", regex=False), errors="coerce")
+
+
+def text_frame(rows, columns, fields=PRICE_FIELDS):
+    # Raw table cell texts -> DataFrame, price columns parsed in bulk and the
+    # rest stripped
+    frame = pd.DataFrame(list(rows), columns=columns)
+    for column in columns:
+        frame[column] = parse_prices(frame[column]) if column in fields else frame[column].str.strip()
+    return frame
+
+
+def _columns(rows, by, fields):
+    # Column at a time with map/itemgetter, which keeps the per-row work in C;
+    # rows missing a key or holding text prices take pandas' generic path
+    rows = rows if isinstance(rows, list) else list(rows)
+    try:
+        data = {by: list(map(itemgetter(by), rows))}
+        for field in fields:
+            data[field] = np.array(list(map(itemgetter(field), rows)), dtype="float64")
+    except (KeyError, TypeError, ValueError):
+        return pd.DataFrame(rows, columns=[by, *fields])
+    return pd.DataFrame(data)
+
+
+def to_frame(rows, by="State", fields=PRICE_FIELDS):
+    # Rows as a DataFrame with numeric price columns; anything that is not a
+    # positive number (None, 0, text) is missing, as in every scraper's output
+    frame = rows.copy() if isinstance(rows, pd.DataFrame) else _columns(rows, by, fields)
+    for field in fields:
+        values = pd.to_numeric(frame[field], errors="coerce").astype("float64")
+        frame[field] = values.where(values > 0)
+    return frame
+
+
+def _sort_groups(codes, values, groups):
+    # NaNs dropped, then ordered by group and by value within each group, plus
+    # per-group counts and the offset where each group starts
+    valid = ~np.isnan(values)
+    codes, values = codes[valid], values[valid]
+    if len(values):
+        # One float key instead of a lexsort; it only decides the order, the
+        # values themselves are read back untouched
+        low = values.min()
+        order = np.argsort(codes * (values.max() - low + 1) + (values - low))
+        codes, values = codes[order], values[order]
+    counts = np.bincount(codes, minlength=groups)
+    return codes, values, counts, np.cumsum(counts) - counts
+
+
+def _group_median(codes, values, groups):
+    # NaN-skipping median of `values` per integer group code
+    codes, values, counts, starts = _sort_groups(codes, values, groups)
+    present = counts > 0
+    lower = (starts + (counts - 1) // 2)[present]
+    upper = (starts + counts // 2)[present]
+    median = np.full(groups, np.nan)
+    median[present] = (values[lower] + values[upper]) / 2
+    return median, counts
+
+
+def reject_outliers(frame, fields=PRICE_FIELDS, by=None, threshold=None):
+    # Blank out prices whose modified z-score in log space exceeds the
+    # threshold, within each `by` group or across the whole frame
+    threshold = OUTLIER_THRESHOLD if threshold is None else threshold
+    if threshold <= 0 or frame.empty:
+        return frame
+    if by is None:
+        codes, groups = np.zeros(len(frame), dtype=np.intp), 1
+    else:
+        codes, uniques = pd.factorize(frame[by])
+        # Rows without a group (code -1) are never outliers
+        codes = np.where(codes < 0, len(uniques), codes)
+        groups = len(uniques) + 1
+    frame = frame.copy()
+    for field in fields:
+        logs = np.log(frame[field].to_numpy(dtype="float64"))
+        median, counts = _group_median(codes, logs, groups)
+        deviation = np.abs(logs - median[codes])
+        mad, _ = _group_median(codes, deviation, groups)
+        score = 0.6745 * deviation / np.maximum(mad[codes], MIN_LOG_MAD)
+        outlier = (score > threshold) & (counts[codes] >= OUTLIER_MIN_SAMPLES)
+        if by is not None:
+            outlier &= codes < groups - 1
+        frame[field] = frame[field].mask(outlier)
+    return frame
+
+
+def _trimmed_mean(frame, by, fields, trim):
+    # Mean of each group after cutting floor(n * trim) values off both ends
+    codes, uniques = pd.factorize(frame[by], sort=True)
+    grouped = codes >= 0
+    codes, groups = codes[grouped], len(uniques)
+    columns = {}
+    for field in fields:
+        values = frame[field].to_numpy(dtype="float64")[grouped]
+        codes_sorted, values, counts, starts = _sort_groups(codes, values, groups)
+        position = np.arange(len(values)) - starts[codes_sorted]
+        cut = np.floor(counts * trim).astype(np.intp)
+        kept = (position >= cut[codes_sorted]) & (position < (counts - cut)[codes_sorted])
+        sums = np.bincount(codes_sorted[kept], weights=values[kept], minlength=groups)
+        sizes = np.bincount(codes_sorted[kept], minlength=groups)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            columns[field] = np.where(sizes > 0, sums / sizes, np.nan)
+    return pd.DataFrame(columns, index=pd.Index(uniques, name=by))
+
+
+def aggregate(rows, by="State", fields=PRICE_FIELDS, statistic=None, trim=None, reject=True):
+    # One row per `by` value with `statistic` of each field over its valid
+    # prices (NaN where a group had none), indexed and sorted by `by`
+    statistic = statistic or STATISTIC
+    frame = to_frame(rows, by, fields)
+    if reject:
+        frame = reject_outliers(frame, fields, by)
+    if statistic == "mean":
+        table = frame.groupby(by)[list(fields)].mean()
+    elif statistic == "median":
+        table = frame.groupby(by)[list(fields)].median()
+    elif statistic == "trimmed_mean":
+        table = _trimmed_mean(frame, by, fields, TRIM if trim is None else trim)
+    else:
+        raise ValueError(f"Unknown statistic {statistic!r}")
+    return table.reindex(columns=list(fields)).sort_index()
+
+
+def to_records(table, by="State", digits=None, integer=False, missing=0):
+    # Back to the published list-of-dicts shape: `by` first, then the fields
+    # rounded to `digits` (or floored, with integer=True), with `missing` for
+    # NaN. digits=0 and integer=True both publish ints
+    whole = integer or digits == 0
+    if integer:
+        values = np.floor(table)
+    elif digits is not None:
+        values = table.round(digits)
+    else:
+        values = table
+    values = values.astype(object).where(values.notna(), missing)
+    records = []
+    for key, row in zip(values.index, values.to_dict("records")):
+        record = {by: key}
+        for field, value in row.items():
+            record[field] = int(value) if whole and value is not missing else value
+        records.append(record)
+    return records
+
+
+def flag_outliers(records, fields=PRICE_FIELDS, replacement=0):
+    # Cross-state check for scrapers that publish one value per state:
+    # outlying prices become `replacement`, everything else is left untouched
+    if not records:
+        return records
+    frame = to_frame([record or {} for record in records], fields=fields)
+    kept = reject_outliers(frame, fields)
+    flagged = []
+    for position, record in enumerate(records):
+        if record is None:
+            flagged.append(record)
+            continue
+        record = dict(record)
+        for field in fields:
+            if pd.notna(frame[field].iat[position]) and pd.isna(kept[field].iat[position]):
+                record[field] = replacement
+        flagged.append(record)
+    return flagged
@@ -0,0 +1,60 @@
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+# Benchmarks import the scraper modules from the repo root
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+# Every measurement fetches for real: nothing is resumed from a run journal
+os.environ["SCRAPER_JOURNAL"] = "0"
+
+
+@contextmanager
+def serve(route, latency=None, post=None):
+    # route(path) -> (status, body) or (status, body, headers); post(path, form) -> (status, body)
+    # with form as {name: value}; latency(path) -> seconds to sleep before answering
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if latency:
+                time.sleep(latency(self.path))
+            self._send(*route(self.path))
+
+        def do_POST(self):
+            if latency:
+                time.sleep(latency(self.path))
+            length = int(self.headers.get("Content-Length") or 0)
+            form = {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode("utf-8"), keep_blank_values=True).items()}
+            if post is None:
+                self._send(405, "")
+            else:
+                self._send(*post(self.path, form))
+
+        def _send(self, status, body, headers=None):
+            if isinstance(body, str):
+                body = body.encode("utf-8")
+            headers = {"Content-Type": "text/html; charset=utf-8", **(headers or {})}
+            self.send_response(status)
+            for name, value in headers.items():
+                self.send_header(name, value)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield f"http://127.0.0.1:{server.server_address[1]}"
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,110 @@
+import random
+import time
+from collections import defaultdict
+from statistics import mean
+
+from _standin import ROOT  # noqa: F401  (puts the repo root on sys.path)
+
+import aggregation
+
+ROWS = 300_000
+STATES = [f"state-{i}" for i in range(36)]
+FIELDS = ("Minimum_Price", "Maximum_Price", "Current_Price")
+
+
+def synthetic_rows(rng, count):
+    rows = []
+    for _ in range(count):
+        low = rng.randint(400, 1500)
+        rows.append({
+            "State": rng.choice(STATES),
+            "Minimum_Price": rng.choice([0, low]),
+            "Maximum_Price": low + rng.randint(0, 1500),
+            "Current_Price": low + rng.randint(0, 800),
+        })
+    return rows
+
+
+def old_agmarknet(data):
+    # summarize's grouping before the aggregation engine
+    grouped = defaultdict(lambda: {"min": [], "max": [], "current": []})
+    for row in data:
+        if row["Minimum_Price"] > 0:
+            grouped[row["State"]]["min"].append(row["Minimum_Price"])
+        if row["Maximum_Price"] > 0:
+            grouped[row["State"]]["max"].append(row["Maximum_Price"])
+        if row["Current_Price"] > 0:
+            grouped[row["State"]]["current"].append(row["Current_Price"])
+    result = {}
+    for state, prices in grouped.items():
+        if prices["min"] and prices["max"] and prices["current"]:
+            result[state] = {
+                "Minimum_Price": sum(prices["min"]) // len(prices["min"]),
+                "Maximum_Price": sum(prices["max"]) // len(prices["max"]),
+                "Current_Price": sum(prices["current"]) // len(prices["current"]),
+            }
+    return result
+
+
+def new_agmarknet(data):
+    table = aggregation.aggregate(data, fields=FIELDS, reject=False).dropna()
+    return {r.pop("State"): r for r in aggregation.to_records(table, integer=True)}
+
+
+def old_mandiprices(data):
+    # scrape_mandiprices' averaging before the aggregation engine (5500 cap)
+    grouped = defaultdict(list)
+    for row in data:
+        grouped[row["State"]].append(row)
+    out = {}
+    for state, items in grouped.items():
+        values = {f: [i[f] for i in items if i[f] and i[f] <= 5500] for f in FIELDS}
+        out[state] = {f: round(mean(v)) if v else 0 for f, v in values.items()}
+    return out
+
+
+def new_mandiprices(data, reject=True):
+    table = aggregation.aggregate(data, fields=FIELDS, reject=reject)
+    return {r.pop("State"): r for r in aggregation.to_records(table, digits=0)}
+
+
+def timed(func, data):
+    start = time.perf_counter()
+    result = func(data)
+    return time.perf_counter() - start, result
+
+
+def main():
+    rng = random.Random(11)
+    data = synthetic_rows(rng, ROWS)
+
+    old_time, old = timed(old_agmarknet, data)
+    new_time, new = timed(new_agmarknet, data)
+    assert old == new, "engine disagrees with the agmarknet loop"
+    print(f"agmarknet summarize, {ROWS} rows   loops {old_time * 1000:7.1f} ms  engine {new_time * 1000:6.1f} ms")
+
+    # Nothing here reaches the 5500 cap, so with rejection off both must agree
+    old_time, old = timed(old_mandiprices, data)
+    new_time, new = timed(lambda rows: new_mandiprices(rows, reject=False), data)
+    assert old == new, "engine disagrees with the mandiprices loop on clean data"
+    print(f"mandiprices averages, {ROWS} rows  loops {old_time * 1000:7.1f} ms  engine {new_time * 1000:6.1f} ms")
+
+    # Per-kg and per-tonne typos: the cap only catches the latter, MAD both
+    dirty = [dict(row) for row in data]
+    for row in rng.sample(dirty, ROWS // 100):
+        row["Current_Price"] = rng.choice([row["Current_Price"] // 100, row["Current_Price"] * 10])
+    clean = new_mandiprices(data, reject=False)
+    for label, func in (("5500 cap", old_mandiprices), ("MAD", new_mandiprices)):
+        result = func(dirty)
+        drift = max(abs(result[s]["Current_Price"] - clean[s]["Current_Price"]) for s in clean)
+        print(f"1% unit typos, worst state drift with {label:<8} {drift:5d} Rs/quintal")
+
+    elapsed, _ = timed(new_mandiprices, data)
+    print(f"mean with MAD rejection {ROWS} rows {elapsed * 1000:7.1f} ms")
+    for statistic in ("median", "trimmed_mean"):
+        elapsed, _ = timed(lambda rows: aggregation.aggregate(rows, fields=FIELDS, statistic=statistic), data)
+        print(f"{statistic:<23} {ROWS} rows {elapsed * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
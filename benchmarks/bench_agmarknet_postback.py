@@ -0,0 +1,85 @@
+import asyncio
+import os
+import re
+import time
+
+from _standin import serve
+
+import commodities
+import scrape_agmarknet_gov_in as agmarknet
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "agmarknet")
+
+PAGES = {
+    name: open(os.path.join(FIXTURES, f"{name}.html"), encoding="utf-8").read()
+    for name in ("home", "commodity_selected", "grid")
+}
+
+served = {"requests": 0, "bytes": 0}
+
+
+def tokens(html):
+    return tuple(re.search(rf'id="{name}" value="([^"]*)"', html).group(1) for name in ("__VIEWSTATE", "__EVENTVALIDATION"))
+
+
+def answer(name, commodity="24"):
+    # The recorded grid is Potato's; other commodities get the same grid relabelled
+    html = PAGES[name]
+    if name == "grid" and commodity != "24":
+        label = next(info["label"] for info in commodities.COMMODITIES.values() if info["agmarknet"] == commodity)
+        html = html.replace(">Potato<", f">{label}<")
+    served["requests"] += 1
+    served["bytes"] += len(html.encode("utf-8"))
+    return 200, html
+
+
+def route(path):
+    return answer("home")
+
+
+def post(path, form):
+    # Like WebForms, reject postbacks whose state did not come from a page we served
+    source = next((name for name, html in PAGES.items()
+                   if tokens(html) == (form.get("__VIEWSTATE"), form.get("__EVENTVALIDATION"))), None)
+    if source is None:
+        return 500, "Invalid postback or callback argument."
+    known = {info["agmarknet"] for info in commodities.COMMODITIES.values()}
+    if form.get("__EVENTTARGET") == "ddlCommodity":
+        return answer("commodity_selected" if form.get("ddlCommodity") in known else "home")
+    if form.get("btnGo") == "Go" and form.get("ddlCommodity") in known and form.get("ddlArrivalPrice") == "0":
+        return answer("grid", form.get("ddlCommodity"))
+    return answer(source)
+
+
+def main():
+    with serve(route, post=post) as base_url:
+        agmarknet.AGMARKNET_URL = base_url + "/"
+        agmarknet.AGMARKNET_USE_PROXY = False
+        start = time.perf_counter()
+        results = asyncio.run(agmarknet.scrape_all_states(mode="http"))
+        elapsed = time.perf_counter() - start
+
+    expected = agmarknet.summarize(agmarknet.parse_grid(PAGES["grid"]))
+    assert results == expected, "postback client does not reproduce the recorded grid"
+    print(f"postback client: {len(results)} states in {elapsed:.2f}s (incl. 2s trailing sleep), "
+          f"{served['requests']} requests, {served['bytes'] / 1024:.0f} KB of HTML")
+
+    # Three commodities: one run each (old way) against one batched session
+    names = list(commodities.COMMODITIES)
+    with serve(route, post=post) as base_url:
+        agmarknet.AGMARKNET_URL = base_url + "/"
+        for label, run in (
+            ("one run per commodity", lambda: [asyncio.run(agmarknet.scrape_all_states(mode="http", commodity=name)) for name in names]),
+            ("batched session", lambda: list(asyncio.run(agmarknet.scrape_commodities(names, mode="http")).values())),
+        ):
+            served.update(requests=0, bytes=0)
+            start = time.perf_counter()
+            batch = run()
+            elapsed = time.perf_counter() - start
+            assert all(result == expected for result in batch) and len(batch) == len(names)
+            print(f"{len(names)} commodities, {label:<22} {elapsed:5.2f}s  {served['requests']} requests, "
+                  f"{served['bytes'] / 1024:.0f} KB of HTML")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+import asyncio
+import tempfile
+import time
+from collections import Counter
+
+from _standin import serve
+
+import browser_session
+from browser_session import BrowserState, browser_context
+
+LOADS = 4
+
+# A stand-in SPA: the page is small, the bundle is large, slow and cacheable,
+# and the app remembers its dropdown in localStorage and a cookie
+PAGE = """<html><body><select id="commodity"></select><div id="app"></div>
+<script src="/static/bundle.js"></script></body></html>"""
+
+BUNDLE = "\n".join(f"function f{i}(x) {{ return x * {i} + {i % 7}; }}" for i in range(60_000)) + """
+const saved = localStorage.getItem("commodity");
+document.cookie = "session=warm; max-age=3600; path=/";
+localStorage.setItem("commodity", "Potato");
+document.getElementById("app").innerHTML = '<table id="grid"><tr><td>' + (saved || "fresh") + '</td></tr></table>';
+"""
+
+served = Counter()
+
+
+def route(path):
+    served[path] += 1
+    if path.startswith("/static/"):
+        return 200, BUNDLE, {"Content-Type": "application/javascript", "Cache-Control": "public, max-age=3600"}
+    return 200, PAGE
+
+
+def latency(path):
+    return 0.4 if path.startswith("/static/") else 0.05
+
+
+async def load(base_url, state):
+    # Seconds from a new context to the rendered grid, and whether the app
+    # found its remembered state
+    start = time.perf_counter()
+    async with browser_context(launch_options={"headless": True}, state=state) as context:
+        page = await context.new_page()
+        await page.goto(base_url, wait_until="domcontentloaded")
+        await page.wait_for_selector("#grid")
+        elapsed = time.perf_counter() - start
+        remembered = await page.inner_text("#grid") != "fresh"
+    return elapsed, remembered
+
+
+async def run(base_url, mode, root):
+    timings = []
+    for i in range(LOADS):
+        # The last load bumps the layout, which must start cold again
+        layout = "v2" if i == LOADS - 1 else "v1"
+        before = served["/static/bundle.js"]
+        elapsed, remembered = await load(base_url, BrowserState("bench", layout, mode=mode, root=root))
+        timings.append((layout, elapsed, remembered, served["/static/bundle.js"] - before))
+    return timings
+
+
+def main():
+    with serve(route, latency) as base_url:
+        for mode in ("off", "storage", "profile"):
+            with tempfile.TemporaryDirectory() as root:
+                browser_session.launch_times.clear()
+                timings = asyncio.run(run(base_url, mode, root))
+            print(f"{mode}:")
+            for i, (layout, elapsed, remembered, bundles) in enumerate(timings):
+                kind = "cold" if i == 0 or layout != timings[i - 1][0] or mode == "off" else "warm"
+                print(f"   load {i + 1} ({kind}, layout {layout})  {elapsed:5.2f}s  "
+                      f"bundle fetched {bundles}x  state remembered {remembered}")
+
+
+if __name__ == "__main__":
+    main()
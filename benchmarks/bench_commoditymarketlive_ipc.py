@@ -0,0 +1,78 @@
+import asyncio
+import inspect
+import time
+
+from playwright.async_api import async_playwright
+
+from _standin import serve
+
+import scrape_commoditymarketlive_com as live
+
+ROW = "<tr><td>{label}</td><td>₹ {value}/Quintal</td></tr>"
+
+LABELS = [
+    "Average Market Price:", "Minimum Market Price:", "Maximum Market Price:",
+    "Price Date:", "Total Markets:", "Arrival:"
+]
+
+
+def route(path):
+    seed = sum(map(ord, path)) % 1500
+    rows = "".join(ROW.format(label=label, value=f"{1000 + seed + i * 50:,}") for i, label in enumerate(LABELS))
+    return 200, f"<html><body><table class='pricesummarytable'><tbody>{rows}</tbody></table></body></html>"
+
+
+class Counter:
+    calls = 0
+
+
+class Counting:
+    # Counts every awaited Playwright call made through the page and the handles it returns
+    def __init__(self, target, counter):
+        self._target = target
+        self._counter = counter
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if not inspect.iscoroutinefunction(attr):
+            return attr
+
+        async def call(*args, **kwargs):
+            self._counter.calls += 1
+            return self._wrap(await attr(*args, **kwargs))
+        return call
+
+    def _wrap(self, value):
+        if isinstance(value, list):
+            return [self._wrap(v) for v in value]
+        if hasattr(value, "inner_text"):
+            return Counting(value, self._counter)
+        return value
+
+
+async def run(bulk):
+    counter = Counter()
+    results = []
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = Counting(await browser.new_page(), counter)
+        start = time.perf_counter()
+        for state in live.states:
+            results.append(await live.scrape_state_price(page, state, bulk=bulk))
+        elapsed = time.perf_counter() - start
+        await browser.close()
+    return counter.calls / len(live.states), elapsed, results
+
+
+def main():
+    with serve(route) as base_url:
+        live.BASE_URL = base_url
+        before_calls, before_time, before = asyncio.run(run(bulk=False))
+        after_calls, after_time, after = asyncio.run(run(bulk=True))
+    assert before == after
+    print(f"per-cell : {before_calls:5.1f} IPC calls/state  {before_time:6.2f}s")
+    print(f"bulk     : {after_calls:5.1f} IPC calls/state  {after_time:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
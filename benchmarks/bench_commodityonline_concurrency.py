@@ -0,0 +1,50 @@
+import asyncio
+import random
+import time
+
+from _standin import serve
+
+import scrape_commodityonline_com as online
+
+PAGE = """<html><body>
+<div class="mandi_highlight"><div class="row">
+<div class="col-md-4"><h4>Average Price</h4><p>₹{avg}/Quintal</p></div>
+<div class="col-md-4"><h4>Lowest Market Price</h4><p>₹{low}/Quintal</p></div>
+<div class="col-md-4"><h4>Costliest Market Price</h4><p>₹{high}/Quintal</p></div>
+</div></div>
+</body></html>"""
+
+
+def route(path):
+    state = path.rstrip("/").rsplit("/", 1)[-1]
+    seed = sum(map(ord, state))
+    return 200, PAGE.format(avg=1000 + seed, low=800 + seed, high=1200 + seed)
+
+
+def latency(path):
+    # Deterministic 0.2-1.2s per state, with a few slow outliers
+    rng = random.Random(path)
+    return 3.0 if rng.random() < 0.1 else rng.uniform(0.2, 1.2)
+
+
+async def run(concurrency):
+    start = time.perf_counter()
+    results = await online.scrape_all_states(concurrency=concurrency, fast_path=False)
+    return time.perf_counter() - start, results
+
+
+def main():
+    with serve(route, latency) as base_url:
+        online.BASE_URL = base_url
+        baseline = None
+        for concurrency in (1, 2, 4, 8):
+            elapsed, results = asyncio.run(run(concurrency))
+            assert [r["State"] for r in results] == online.states
+            if baseline is None:
+                baseline = results
+            assert results == baseline
+            print(f"concurrency={concurrency:<2} wall={elapsed:6.2f}s")
+
+
+if __name__ == "__main__":
+    main()
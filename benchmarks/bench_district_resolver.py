@@ -0,0 +1,92 @@
+import difflib
+import json
+import random
+import string
+import time
+
+from _standin import ROOT  # noqa: F401  (puts the repo root on sys.path)
+
+from district_resolver import DATA_PATH, CloseMatcher, DistrictResolver
+
+NAMES = 10_000
+
+
+def old_resolver(data):
+    # get_state_from_district as it was before the resolver index
+    district_to_state = {}
+    for entry in data:
+        state = entry.get("name", "").strip()
+        for district in entry.get("districts", []):
+            district_lower = district.strip().lower()
+            if district_lower:
+                district_to_state[district_lower] = state
+    known_districts = list(district_to_state.keys())
+
+    def get_state_from_district(district_name):
+        if not district_name:
+            return "Unknown"
+        name = district_name.strip().lower()
+        if name in district_to_state:
+            return district_to_state[name]
+        match = difflib.get_close_matches(name, known_districts, n=1, cutoff=0.7)
+        if match:
+            return district_to_state[match[0]]
+        return "Unknown"
+    return get_state_from_district
+
+
+def synthetic_names(districts, count, unique):
+    rng = random.Random(1234)
+    names = []
+    while len(names) < count:
+        name = list(rng.choice(districts))
+        for _ in range(rng.randint(0, 3)):
+            op = rng.random()
+            pos = rng.randrange(len(name) + 1)
+            if op < 0.3 and name:
+                del name[min(pos, len(name) - 1)]
+            elif op < 0.6:
+                name.insert(pos, rng.choice(string.ascii_lowercase + " "))
+            elif op < 0.8 and len(name) > 1:
+                i = min(pos, len(name) - 2)
+                name[i], name[i + 1] = name[i + 1], name[i]
+        candidate = "".join(name).title() if rng.random() < 0.5 else "".join(name)
+        if rng.random() < 0.05:
+            candidate = "".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 14)))
+        names.append(candidate)
+    if not unique:
+        # Real grids repeat the same districts across many market rows
+        names = [rng.choice(names[:count // 10]) for _ in range(count)]
+    return names
+
+
+def timed(resolve, names):
+    start = time.perf_counter()
+    answers = [resolve(name) for name in names]
+    return time.perf_counter() - start, answers
+
+
+def main():
+    with open(DATA_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    old = old_resolver(data)
+    districts = [d for entry in data for d in entry.get("districts", [])]
+
+    for label, unique in (("10k distinct names", True), ("10k names, grid-like repeats", False)):
+        names = synthetic_names(districts, NAMES, unique)
+        old_time, old_answers = timed(old, names)
+        resolver = DistrictResolver(data)
+        new_time, new_answers = timed(resolver.resolve, names)
+        assert new_answers == old_answers, "resolver disagrees with difflib"
+        print(f"{label:<30} difflib {old_time:7.2f}s  resolver {new_time:6.2f}s  ({old_time / new_time:5.1f}x)")
+
+    required = ["andhra-pradesh", "uttar-pradesh", "west-bengal", "tamil-nadu", "delhi", "uttrakhand"]
+    keys = synthetic_names(["-".join(s.lower().split()) for s in {e["name"] for e in data}], 200, True)
+    matcher = CloseMatcher(keys, 0.8)
+    for state in required:
+        expected = difflib.get_close_matches(state, keys, n=1, cutoff=0.8)
+        assert matcher.best(state) == (expected[0] if expected else None)
+
+
+if __name__ == "__main__":
+    main()
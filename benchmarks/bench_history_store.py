@@ -0,0 +1,74 @@
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+
+from _standin import ROOT  # noqa: F401  (puts the repo root on sys.path)
+
+from history_store import HistoryStore
+
+STATES = 36
+RUNS = 60
+
+
+def synthetic_run(rng):
+    return [
+        {"State": f"State {i}", "Current_Price": rng.randint(800, 4000),
+         "Minimum_Price": rng.randint(500, 800), "Maximum_Price": rng.randint(4000, 5500)}
+        for i in range(STATES)
+    ]
+
+
+def old_save_with_date(docs, filename, new_data, today):
+    # save_with_date as it was in scrape_all.main before the history store
+    path = os.path.join(docs, filename)
+    existing = {}
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            existing = json.load(f)
+    cleaned = {}
+    for k, v in existing.items():
+        if (today - datetime.date.fromisoformat(k)).days <= 30:
+            cleaned[k] = v
+    cleaned[today.isoformat()] = new_data
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cleaned, f, indent=2)
+    return os.path.getsize(path), len(cleaned)
+
+
+def published_save(docs, filename, new_data, today, views=False):
+    # What the workflow commits: today's partition and index.json, no view
+    store = HistoryStore(os.path.join(docs, "history"), today=today, views=views)
+    store.save(filename, new_data, docs)
+    store.write_index()
+    return sum(os.path.getsize(p) for p in set(store.writes)), len(store.partitions(filename))
+
+
+def local_save(docs, filename, new_data, today):
+    # A local run, which also keeps the {date: data} view up to date
+    return published_save(docs, filename, new_data, today, views=True)
+
+
+def main():
+    rng = random.Random(7)
+    runs = [synthetic_run(rng) for _ in range(RUNS)]
+    start_day = datetime.date(2025, 1, 1)
+    for label, save in (("rewrite whole file", old_save_with_date), ("partitions (published)", published_save),
+                        ("partitions + view", local_save)):
+        with tempfile.TemporaryDirectory() as docs:
+            elapsed, written = 0.0, 0
+            for i, data in enumerate(runs):
+                # Two runs a day like the workflow; the second one repeats the first
+                day = start_day + datetime.timedelta(days=i)
+                for _ in range(2):
+                    t0 = time.perf_counter()
+                    size, days = save(docs, "result.json", data, day)
+                    written += size
+                    elapsed += time.perf_counter() - t0
+        print(f"{label:<24} {elapsed * 1000:8.1f} ms  {written / 1024:8.0f} KB written over {RUNS * 2} runs  ({days} days kept)")
+
+
+if __name__ == "__main__":
+    main()
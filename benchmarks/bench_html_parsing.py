@@ -0,0 +1,126 @@
+import asyncio
+import os
+import time
+
+from bs4 import BeautifulSoup
+
+from _standin import ROOT  # noqa: F401  (puts the repo root on sys.path)
+
+import aggregation
+import html_parsing
+import scrape_agmarknet_gov_in as agmarknet
+import scrape_commoditymarketlive_com as live
+import scrape_commodityonline_com as online
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding="utf-8") as f:
+        return f.read()
+
+
+ONLINE_PAGE = fixture("commodityonline", "uttar-pradesh.html")
+LIVE_PAGE = fixture("commoditymarketlive", "west-bengal.html")
+GRID_PAGE = fixture("agmarknet", "grid.html")
+# Text with &, < and > around and inside the markup every backend serializes
+ESCAPED_PAGE = fixture("html_parsing", "escaped_text.html")
+GRID_TABLE = str(BeautifulSoup(GRID_PAGE, "html.parser").find(id="cphBody_GridPriceData"))
+
+
+def big_grid(rows=5000):
+    head, _, rest = GRID_TABLE.partition("</tr>")
+    body = rest.rsplit("</table>", 1)[0]
+    copies = rows // max(body.count("<tr>"), 1) + 1
+    return head + "</tr>" + body * copies + "</table>"
+
+
+def reference_grid(html):
+    # What parse_grid read before the parser abstraction
+    soup = BeautifulSoup(html, "html.parser")
+    headers = [th.text.strip() for th in soup.select("tr th")]
+    return headers, [[td.text.strip() for td in row.select("td")] for row in soup.select("tr")[1:]]
+
+
+def outputs():
+    return {
+        "online labelled_values": html_parsing.labelled_values(
+            html_parsing.inner_html(ONLINE_PAGE, "div.mandi_highlight"), "div.row > div.col-md-4", "h4", "p"),
+        "online parse_state_page": online.parse_state_page(ONLINE_PAGE),
+        "escaped inner_html": html_parsing.inner_html(ESCAPED_PAGE, "div.mandi_highlight"),
+        "escaped labelled_values": html_parsing.labelled_values(
+            html_parsing.inner_html(ESCAPED_PAGE, "div.mandi_highlight"), "div.row > div.col-md-4", "h4", "p"),
+        "live table_rows": [[c.strip() for c in row] for row in html_parsing.table_rows(LIVE_PAGE, live.ROWS_SELECTOR)],
+        "live parse_state_page": live.parse_state_page("west-bengal", LIVE_PAGE),
+        "agmarknet grid (page)": html_parsing.grid(GRID_TABLE),
+        "agmarknet parse_grid": agmarknet.parse_grid(GRID_TABLE),
+    }
+
+
+def check_parity():
+    expected = None
+    for name in html_parsing.BACKENDS:
+        html_parsing.BACKEND = name
+        got = outputs()
+        if expected is None:
+            expected = got
+            assert got["agmarknet grid (page)"] == reference_grid(GRID_TABLE)
+            assert got["online parse_state_page"]["Current_Price"] == 1245.5
+            # The parser keeps the page's price; an outlier is only zeroed
+            # against the other states' prices
+            live_prices = got["live parse_state_page"]
+            assert live_prices["Maximum_Price"] == 7250.0
+            peers = [{**live_prices, "State": f"peer-{i}", "Maximum_Price": 1800.0 + 50 * i} for i in range(5)]
+            assert aggregation.flag_outliers([live_prices, *peers])[0]["Maximum_Price"] == 0
+        for key in expected:
+            assert got[key] == expected[key], f"{name} differs from html.parser on {key}"
+        print(f"parity ok: {name}")
+
+
+def throughput(html, label, repeat):
+    for name in html_parsing.BACKENDS:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            html_parsing.grid(html, backend=name)
+        elapsed = time.perf_counter() - start
+        print(f"{label:<18} {name:<12} {repeat / elapsed:8.1f} grids/s  {len(html) * repeat / elapsed / 1e6:6.2f} MB/s")
+
+
+async def loop_lag(html, parses):
+    # Longest gap between 5ms ticks while parses run through parse_off_loop
+    lag = 0.0
+    done = asyncio.Event()
+
+    async def ticker():
+        nonlocal lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - start - 0.005)
+
+    tick = asyncio.create_task(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    for _ in range(parses):
+        await html_parsing.parse_off_loop(html_parsing.grid, html)
+    elapsed = time.perf_counter() - start
+    done.set()
+    await tick
+    return elapsed, lag
+
+
+def main():
+    check_parity()
+    throughput(GRID_TABLE, "grid 150 rows", 50)
+    large = big_grid()
+    throughput(large, "grid ~5000 rows", 3)
+
+    html_parsing.BACKEND = "html.parser"
+    for executor in ("inline", "thread", "process"):
+        html_parsing.EXECUTOR = executor
+        elapsed, lag = asyncio.run(loop_lag(large, 3))
+        print(f"executor={executor:<8} 3 large parses {elapsed:5.2f}s  worst event-loop stall {lag * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import asyncio
+import random
+import sys
+import time
+
+from _standin import serve
+
+import scrape_commoditymarketlive_com as live
+import scrape_commodityonline_com as online
+from bench_commoditymarketlive_ipc import route as live_route
+from bench_commodityonline_concurrency import route as online_route
+
+
+def route(path):
+    if path.startswith("/online/"):
+        return online_route(path)
+    return live_route(path)
+
+
+def latency(path):
+    return random.Random(path).uniform(0.1, 0.5)
+
+
+async def run(fast_path):
+    start = time.perf_counter()
+    online_results = await online.scrape_all_states(fast_path=fast_path)
+    live_results = await live.scrape_all_states(fast_path=fast_path)
+    return time.perf_counter() - start, online_results, live_results
+
+
+def main():
+    modes = [True] if "--http-only" in sys.argv else [True, False]
+    with serve(route, latency) as base_url:
+        online.BASE_URL = base_url + "/online"
+        live.BASE_URL = base_url + "/live"
+        outputs = {}
+        for fast_path in modes:
+            elapsed, online_results, live_results = asyncio.run(run(fast_path))
+            outputs[fast_path] = (online_results, live_results)
+            print(f"{'http fast path' if fast_path else 'playwright':<15} wall={elapsed:6.2f}s")
+        assert all(r["Current_Price"] for r in outputs[True][0] + outputs[True][1])
+        if False in outputs:
+            assert outputs[True] == outputs[False]
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import asyncio
+import os
+import random
+import time
+import tracemalloc
+
+from playwright.async_api import async_playwright
+
+from _standin import serve
+
+import scrape_mandiprices_in as mandi
+
+ROWS = 5000
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "mandiprices", "table.html")
+
+# What iter_table makes of the fixture: rows go to the commodity their cell
+# names, unknown and blank commodities and short rows are dropped
+FIXTURE_ROWS = [
+    ("potato", ("Uttar Pradesh", "₹1,100", "₹1,400", "₹1,250")),
+    ("potato", ("West Bengal", "₹1,200", "₹1,500", "₹1,350")),
+    ("onion", ("Maharashtra", "₹1,800", "₹2,600", "₹2,200")),
+    ("tomato", ("Karnataka", "₹900", "₹1,600", "₹1,300")),
+]
+
+STATES = ["Uttar Pradesh", "West Bengal", "Punjab", "Gujarat", "Bihar", "Karnataka", "Maharashtra"]
+
+
+def synthetic_table(rows=ROWS):
+    rng = random.Random(42)
+    body = []
+    for i in range(rows):
+        low = rng.randint(800, 2000)
+        cells = [
+            str(i), rng.choice(STATES), f"District {i % 300}", f"Market {i}", "Potato", "Jyoti", "FAQ", "17 Oct 2026",
+            f"₹{low:,}", f"₹{low + rng.randint(100, 900):,}", f"₹{low + rng.randint(50, 500):,}",
+        ]
+        body.append("<tr>" + "".join(f"<td>{c}</td>" for c in cells) + "</tr>")
+    return f"<html><body><table><thead><tr><th>#</th></tr></thead><tbody>{''.join(body)}</tbody></table></body></html>"
+
+
+async def run(base_url, extract):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        page = await browser.new_page()
+        await page.goto(base_url)
+        tracemalloc.start()
+        start = time.perf_counter()
+        rows = [row async for row in extract(page)]
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        await browser.close()
+    return elapsed, peak, rows
+
+
+def main():
+    with open(FIXTURE, encoding="utf-8") as f:
+        fixture = f.read()
+    with serve(lambda path: (200, fixture)) as base_url:
+        _, _, rows = asyncio.run(run(base_url, lambda page: mandi.iter_table(page, "potato")))
+        assert rows == FIXTURE_ROWS, rows
+        print(f"fixture     {len(rows)} rows split by commodity cell")
+
+    html = synthetic_table()
+    with serve(lambda path: (200, html)) as base_url:
+        variants = [
+            ("per-handle", mandi.iter_table_rows_per_handle),
+            ("bulk 500", lambda page: mandi.iter_table_rows(page, chunk_size=500)),
+            ("bulk 1000", lambda page: mandi.iter_table_rows(page, chunk_size=1000)),
+            ("bulk all", lambda page: mandi.iter_table_rows(page, chunk_size=ROWS)),
+        ]
+        reference = None
+        for label, extract in variants:
+            elapsed, peak, rows = asyncio.run(run(base_url, extract))
+            rows = [tuple(r) for r in rows]
+            reference = reference or rows
+            assert rows == reference and len(rows) == ROWS
+            print(f"{label:<11} {ROWS} rows in {elapsed:7.2f}s  ({ROWS / elapsed:8.0f} rows/s, "
+                  f"peak Python alloc {peak / 1024:6.0f} KB)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+import asyncio
+import threading
+import time
+
+from playwright.async_api import async_playwright
+
+from _standin import serve
+
+from browser_session import RssSampler, browser_context
+
+SOURCES = 4
+
+
+def route(path):
+    return 200, "<html><body><table><tr><td>ok</td></tr></table></body></html>"
+
+
+async def open_source(base_url, browser=None):
+    async with browser_context(browser, launch_options={"headless": True}) as context:
+        page = await context.new_page()
+        await page.goto(base_url)
+        await page.inner_text("table")
+
+
+def run_threads(base_url):
+    threads = [threading.Thread(target=lambda: asyncio.run(open_source(base_url))) for _ in range(SOURCES)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+async def run_shared(base_url):
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        await asyncio.gather(*(open_source(base_url, browser) for _ in range(SOURCES)))
+        await browser.close()
+
+
+def main():
+    with serve(route) as base_url:
+        for mode in ("threads", "shared"):
+            start = time.perf_counter()
+            with RssSampler(interval=0.1) as rss:
+                if mode == "threads":
+                    run_threads(base_url)
+                else:
+                    asyncio.run(run_shared(base_url))
+            elapsed = time.perf_counter() - start
+            print(f"{mode:<8} startup+first page={elapsed:6.2f}s  peak RSS={rss.peak_kb / 1024:6.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
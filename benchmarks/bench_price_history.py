@@ -0,0 +1,86 @@
+import datetime
+import json
+import os
+import random
+import tempfile
+import time
+
+from _standin import ROOT  # noqa: F401  (puts the repo root on sys.path)
+
+from price_history import PriceColumns, PriceHistory
+
+SOURCES = ["commoditymarketlive", "commodityonline", "mandiprices", "agmarknet", "combined"]
+STATES = [f"state-{i}" for i in range(36)]
+DAYS = 365
+
+
+def synthetic_day(rng):
+    return {
+        source: [
+            {"State": state, "Current_Price": rng.randint(800, 4000),
+             "Minimum_Price": rng.choice([0, rng.randint(500, 800)]), "Maximum_Price": rng.randint(4000, 5500)}
+            for state in STATES
+        ]
+        for source in SOURCES
+    }
+
+
+def json_rolling_mean(views, state, window):
+    # What a consumer of docs/*.json has to do today: parse every view in full
+    # and walk the nested dicts for one state's series
+    by_day = {}
+    for path in views:
+        with open(path, encoding="utf-8") as f:
+            view = json.load(f)
+        for day, records in view.items():
+            for record in records:
+                price = record.get("Current_Price")
+                if record.get("State") == state and isinstance(price, (int, float)) and price > 0:
+                    by_day.setdefault(day, []).append(price)
+    days = sorted(by_day)
+    means = [sum(by_day[d]) / len(by_day[d]) for d in days]
+    return [sum(means[max(0, i - window + 1):i + 1]) / len(means[max(0, i - window + 1):i + 1]) for i in range(len(means))]
+
+
+def main():
+    rng = random.Random(3)
+    start = datetime.date(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as root:
+        columns = PriceColumns(os.path.join(root, "columns"))
+        views = {source: {} for source in SOURCES}
+        t0 = time.perf_counter()
+        for i in range(DAYS):
+            day = start + datetime.timedelta(days=i)
+            outputs = synthetic_day(rng)
+            columns.ingest(day, outputs)
+            for source, records in outputs.items():
+                views[source][day.isoformat()] = records
+        ingest = (time.perf_counter() - t0) / DAYS
+        paths = []
+        for source, view in views.items():
+            paths.append(os.path.join(root, f"{source}.json"))
+            with open(paths[-1], "w", encoding="utf-8") as f:
+                json.dump(view, f, indent=2)
+
+        t0 = time.perf_counter()
+        expected = json_rolling_mean(paths, "state-7", 7)
+        json_time = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        history = PriceHistory(columns.root)
+        got = history.rolling_mean(window=7, states=["state-7"])["state-7"].tolist()
+        column_time = time.perf_counter() - t0
+        # The day-based window matches the row-based one since there are no gaps
+        assert max(abs(a - b) for a, b in zip(expected, got)) < 0.01 * max(expected)
+
+        t0 = time.perf_counter()
+        quarter = history.frame("2024-04-01", "2024-06-30", sources=["agmarknet"])
+        range_time = time.perf_counter() - t0
+
+    print(f"{DAYS} days x {len(SOURCES)} sources x {len(STATES)} states, ingest {ingest * 1000:.1f} ms/run")
+    print(f"7-day rolling mean, one state   json views {json_time * 1000:8.1f} ms  columns {column_time * 1000:6.1f} ms")
+    print(f"one source, one quarter         {len(quarter)} rows in {range_time * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
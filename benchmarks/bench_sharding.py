@@ -0,0 +1,70 @@
+import filecmp
+import glob
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from _standin import ROOT
+
+from replay import RECORDINGS, Recording, ReplayServer
+from run_suite import child_env
+
+# The per-state sources against the recorded pages, each page slowed down like
+# the real sites; every shard count must publish the same files
+SOURCES = "commodityonline,commoditymarketlive"
+LATENCY = (0.5, 0.5)
+CONCURRENCY = "2"
+SHARDS = (1, 2, 4)
+OUTPUTS = ("result_commodityonline_in.json", "result_commoditymarketlive_in.json", "combined_averages.json")
+
+
+def run(base_url, shards, scratch):
+    docs = os.path.join(scratch, f"docs-{shards}")
+    env = {
+        **child_env(base_url, docs),
+        "SCRAPER_HTTP_CONCURRENCY": CONCURRENCY,
+        "SCRAPER_HTTP_CACHE": "0",
+        "SCRAPER_HEALTH_FILE": os.path.join(scratch, f"health-{shards}.json"),
+        "SCRAPER_SHARD_DIR": os.path.join(scratch, f"shards-{shards}"),
+    }
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "scrape_all.py", "--mode", "threads", "--sources", SOURCES, "--shards", str(shards)],
+                   cwd=ROOT, env=env, capture_output=True, check=True)
+    return time.perf_counter() - start, docs
+
+
+def slowest_source(shards, scratch):
+    # Longest "source" span of any process: the scraping itself, without
+    # interpreter start-up and the merge
+    traces = glob.glob(os.path.join(scratch, f"shards-{shards}", "*", "trace.json")) if shards > 1 else [
+        os.path.join(scratch, f"docs-{shards}", "trace.json")]
+    spans = []
+    for path in traces:
+        with open(path, encoding="utf-8") as f:
+            spans += [event["dur"] / 1e6 for event in json.load(f)["traceEvents"] if event["name"] == "source"]
+    return max(spans)
+
+
+def main():
+    server = ReplayServer(Recording(RECORDINGS), latency=LATENCY).start()
+    try:
+        with tempfile.TemporaryDirectory() as scratch:
+            runs = {shards: run(server.base_url, shards, scratch) for shards in SHARDS}
+            single, single_docs = runs[1]
+            single_scrape = slowest_source(1, scratch)
+            for shards, (elapsed, docs) in runs.items():
+                scrape = slowest_source(shards, scratch)
+                same = all(filecmp.cmp(os.path.join(single_docs, name), os.path.join(docs, name), shallow=False)
+                           for name in OUTPUTS)
+                print(f"{shards} shard(s): {elapsed:6.2f}s wall ({single / elapsed:4.2f}x)  "
+                      f"{scrape:5.2f}s slowest shard scraping ({single_scrape / scrape:4.2f}x)  "
+                      f"outputs {'identical' if same else 'DIFFER'}")
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
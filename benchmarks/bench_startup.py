@@ -0,0 +1,47 @@
+import subprocess
+import sys
+import time
+
+from _standin import ROOT
+
+import sources
+
+RUNS = 5
+
+# Each measurement is a fresh interpreter, so nothing is already in sys.modules
+PROBE = """
+import sys, time
+start = time.perf_counter()
+import scrape_all, sources
+ready = time.perf_counter()
+for key in {keys!r}:
+    sources.load(key)
+done = time.perf_counter()
+print(ready - start, done - ready, "playwright" in sys.modules, "pandas" in sys.modules)
+"""
+
+
+def probe(keys):
+    # Best of RUNS: (seconds to import scrape_all, seconds to load the sources, playwright loaded, pandas loaded)
+    best = None
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", PROBE.format(keys=keys)], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.split()
+        sample = (float(out[0]), float(out[1]), out[2] == "True", out[3] == "True")
+        if best is None or sum(sample[:2]) < sum(best[:2]):
+            best = sample
+    return best
+
+
+def main():
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "scrape_all.py", "--help"], cwd=ROOT, capture_output=True, check=True)
+    print(f"scrape_all.py --help: {time.perf_counter() - start:.2f}s wall")
+    for keys in ([], *([key] for key in sources.SOURCES), list(sources.SOURCES)):
+        startup, load, playwright, pandas = probe(keys)
+        print(f"{','.join(keys) or '(none)':<60} import {startup * 1000:5.0f} ms  sources {load * 1000:5.0f} ms  "
+              f"playwright {'yes' if playwright else 'no '}  pandas {'yes' if pandas else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
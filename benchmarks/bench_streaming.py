@@ -0,0 +1,56 @@
+import asyncio
+import random
+import time
+
+from _standin import serve
+
+import http_cache
+import scrape_commodityonline_com as online
+
+COMMODITIES = ["potato", "onion", "tomato"]
+
+PAGE = """<html><body>
+<div class="mandi_highlight"><div class="row">
+<div class="col-md-4"><h4>Average Price</h4><p>₹{avg}/Quintal</p></div>
+<div class="col-md-4"><h4>Lowest Market Price</h4><p>₹{low}/Quintal</p></div>
+<div class="col-md-4"><h4>Costliest Market Price</h4><p>₹{high}/Quintal</p></div>
+</div></div>
+</body></html>"""
+
+
+def route(path):
+    seed = sum(map(ord, path))
+    return 200, PAGE.format(avg=1000 + seed % 500, low=800 + seed % 500, high=1200 + seed % 500)
+
+
+def latency(path):
+    # Deterministic 0.05-0.4s per page
+    return random.Random(path).uniform(0.05, 0.4)
+
+
+async def run():
+    # Seconds from start until each commodity reached on_commodity, and overall
+    start = time.perf_counter()
+    ready = {}
+    results = await online.scrape_commodities(
+        COMMODITIES, fast_path=True,
+        on_commodity=lambda commodity, _: ready.setdefault(commodity, time.perf_counter() - start),
+    )
+    return time.perf_counter() - start, ready, results
+
+
+def main():
+    http_cache.ENABLED = False
+    with serve(route, latency) as base_url:
+        online.BASE_URL = base_url
+        elapsed, ready, results = asyncio.run(run())
+    assert sorted(results) == sorted(COMMODITIES)
+    assert all(len(results[c]) == len(online.states) for c in COMMODITIES)
+    # Before streaming every commodity became available only when the list returned
+    print(f"{len(COMMODITIES)} commodities x {len(online.states)} states, run took {elapsed:.2f}s")
+    for commodity in COMMODITIES:
+        print(f"   {commodity:<7} ready to write at {ready[commodity]:5.2f}s (list API: {elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
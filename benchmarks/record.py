@@ -0,0 +1,126 @@
+import argparse
+import asyncio
+import os
+import random
+import re
+from urllib.parse import parse_qsl
+
+from _standin import ROOT  # noqa: F401  (puts the repo root on sys.path)
+
+# A recording needs every body in full, never a 304 to a conditional GET or
+# a unit resumed from a run journal
+os.environ["SCRAPER_HTTP_CACHE"] = "0"
+os.environ["SCRAPER_JOURNAL"] = "0"
+
+import browser_session
+import http_fast_path
+from replay import RECORDINGS, Recording
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# Browser responses worth replaying; images, fonts and media are blocked by the scrapers anyway
+RECORDED_TYPES = {"document", "xhr", "fetch", "script", "stylesheet"}
+
+
+def install_recorders(recording):
+    async def on_httpx_response(response):
+        await response.aread()
+        form = None
+        if response.request.method == "POST":
+            form = dict(parse_qsl(response.request.content.decode("utf-8"), keep_blank_values=True))
+        recording.add(response.request.method, str(response.request.url), response.status_code,
+                      response.headers.get("content-type"), response.content, form)
+
+    async def context_hook(context):
+        async def on_response(response):
+            request = response.request
+            if request.resource_type not in RECORDED_TYPES or 300 <= response.status < 400:
+                return
+            try:
+                body = await response.body()
+            except Exception:
+                return
+            form = None
+            if request.method == "POST" and request.post_data:
+                form = dict(parse_qsl(request.post_data, keep_blank_values=True))
+            recording.add(request.method, request.url, response.status,
+                          response.headers.get("content-type"), body, form)
+        context.on("response", on_response)
+
+    http_fast_path.response_hooks.append(on_httpx_response)
+    browser_session.context_hooks.append(context_hook)
+
+
+async def record_live(sources):
+    # Runs each scraper once against the real sites with every response captured
+    if "commodityonline" in sources:
+        import scrape_commodityonline_com
+        await scrape_commodityonline_com.scrape_all_states()
+    if "commoditymarketlive" in sources:
+        import scrape_commoditymarketlive_com
+        await scrape_commoditymarketlive_com.scrape_all_states()
+    if "agmarknet" in sources:
+        import scrape_agmarknet_gov_in
+        await scrape_agmarknet_gov_in.scrape_all_states()
+    if "mandiprices" in sources:
+        import scrape_mandiprices_in
+        await scrape_mandiprices_in.scrape_mandiprices(return_results=True)
+
+
+def fixture(*parts):
+    with open(os.path.join(FIXTURES, *parts), encoding="utf-8") as f:
+        return f.read()
+
+
+def record_synthetic(recording):
+    # Offline stand-ins built from the saved fixtures, one page per state with varied prices.
+    # mandiprices.in is a JS app and has no synthetic version; record it live.
+    import scrape_commoditymarketlive_com as live
+    import scrape_commodityonline_com as online
+
+    rng = random.Random(99)
+    html_type = "text/html; charset=utf-8"
+
+    def vary(page, pattern):
+        return re.sub(pattern, lambda m: f"{m.group(1)}{rng.randint(600, 2400):,}", page)
+
+    online.BASE_URL = "https://www.commodityonline.com"
+    live.BASE_URL = "https://www.commoditymarketlive.com"
+    online_page = fixture("commodityonline", "uttar-pradesh.html")
+    live_page = fixture("commoditymarketlive", "west-bengal.html")
+    for state in online.states:
+        recording.add("GET", online.state_url(state), 200, html_type,
+                      vary(online_page, r"(&#8377;\s*)[\d,]+").encode("utf-8"))
+    for state in live.states:
+        recording.add("GET", live.state_url(state), 200, html_type,
+                      vary(live_page, r"(&#8377;\s*)[\d,]+").encode("utf-8"))
+
+    url = "https://agmarknet.gov.in/"
+    base = {"ddlArrivalPrice": "0", "ddlState": "0", "txtDate": "17-Oct-2026"}
+    recording.add("GET", url, 200, html_type, fixture("agmarknet", "home.html").encode("utf-8"))
+    recording.add("POST", url, 200, html_type, fixture("agmarknet", "commodity_selected.html").encode("utf-8"),
+                  {**base, "ddlCommodity": "24", "__EVENTTARGET": "ddlCommodity"})
+    recording.add("POST", url, 200, html_type, fixture("agmarknet", "grid.html").encode("utf-8"),
+                  {**base, "ddlCommodity": "24", "btnGo": "Go"})
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture site responses for offline replay")
+    parser.add_argument("--out", default=RECORDINGS)
+    parser.add_argument("--sources", default="commodityonline,commoditymarketlive,agmarknet,mandiprices")
+    parser.add_argument("--synthetic", action="store_true", help="build recordings from benchmarks/fixtures instead of the live sites")
+    args = parser.parse_args()
+
+    recording = Recording(args.out)
+    if args.synthetic:
+        record_synthetic(recording)
+    else:
+        install_recorders(recording)
+        asyncio.run(record_live(set(args.sources.split(","))))
+    recording.save()
+    for host, entries in sorted(recording.index.items()):
+        print(f"{host:<32} {len(entries):4} responses")
+
+
+if __name__ == "__main__":
+    main()
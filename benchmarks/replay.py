@@ -0,0 +1,166 @@
+import hashlib
+import json
+import os
+import random
+import socket
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+RECORDINGS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "recordings")
+
+# WebForms state changes on every response, so it can't be part of the lookup key
+VOLATILE_FORM_FIELDS = {"__VIEWSTATE", "__EVENTVALIDATION", "__VIEWSTATEGENERATOR", "__LASTFOCUS", "__EVENTARGUMENT"}
+
+
+def request_key(method, path, form=None):
+    key = f"{method.upper()} {path}"
+    if form:
+        stable = sorted((k, v) for k, v in form.items() if k not in VOLATILE_FORM_FIELDS and v != "")
+        key += " " + "&".join(f"{k}={v}" for k, v in stable)
+    return key
+
+
+def split_url(url):
+    parts = urlsplit(url)
+    return parts.hostname, (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+
+class Recording:
+    # recordings/<host>/index.json maps request keys to {status, content_type, file};
+    # bodies live next to it under bodies/<sha1>
+    def __init__(self, root=RECORDINGS):
+        self.root = root
+        self.index = {}
+        self._lock = threading.Lock()
+        if os.path.isdir(root):
+            for host in os.listdir(root):
+                path = os.path.join(root, host, "index.json")
+                if os.path.exists(path):
+                    with open(path, encoding="utf-8") as f:
+                        self.index[host] = json.load(f)
+
+    def add(self, method, url, status, content_type, body, form=None):
+        host, path = split_url(url)
+        digest = hashlib.sha1(body).hexdigest()
+        body_dir = os.path.join(self.root, host, "bodies")
+        os.makedirs(body_dir, exist_ok=True)
+        with open(os.path.join(body_dir, digest), "wb") as f:
+            f.write(body)
+        with self._lock:
+            self.index.setdefault(host, {})[request_key(method, path, form)] = {
+                "status": status, "content_type": content_type, "file": digest,
+            }
+
+    def lookup(self, host, method, path, form=None):
+        entry = self.index.get(host, {}).get(request_key(method, path, form))
+        if entry is None:
+            return None
+        with open(os.path.join(self.root, host, "bodies", entry["file"]), "rb") as f:
+            return entry["status"], entry["content_type"], f.read()
+
+    def save(self):
+        for host, entries in self.index.items():
+            os.makedirs(os.path.join(self.root, host), exist_ok=True)
+            with open(os.path.join(self.root, host, "index.json"), "w", encoding="utf-8") as f:
+                json.dump(entries, f, indent=2, sort_keys=True)
+
+
+class ReplayServer:
+    # Serves a Recording at http://127.0.0.1:<port>/<host>/<path> with injected latency
+    # (uniform in [min, max] seconds) and failures (a 503 or a dropped connection)
+    def __init__(self, recording, latency=(0.0, 0.0), failure_rate=0.0, seed=0):
+        self.recording = recording
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.rng = random.Random(seed)
+        self.stats = {"requests": 0, "misses": 0, "failures": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._server = None
+
+    def url_for(self, host):
+        return f"{self.base_url}/{host}"
+
+    def _decide(self):
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.rng.uniform(*self.latency)
+            fail = self.rng.random() < self.failure_rate
+            if fail:
+                self.stats["failures"] += 1
+            return delay, fail and self.rng.choice(["503", "drop"])
+
+    def _answer(self, handler, method, form=None):
+        delay, failure = self._decide()
+        time.sleep(delay)
+        if failure == "drop":
+            handler.close_connection = True
+            handler.connection.shutdown(socket.SHUT_RDWR)
+            return
+        host, _, path = handler.path.lstrip("/").partition("/")
+        hit = None if failure else self.recording.lookup(host, method, "/" + path, form)
+        if hit is None:
+            status, content_type, body = (503, "text/plain", b"injected failure") if failure else (404, "text/plain", b"not recorded")
+            if not failure:
+                with self._lock:
+                    self.stats["misses"] += 1
+        else:
+            status, content_type, body = hit
+        with self._lock:
+            self.stats["bytes"] += len(body)
+        handler.send_response(status)
+        handler.send_header("Content-Type", content_type or "text/html; charset=utf-8")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        replay = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real sites
+
+            def do_GET(self):
+                replay._answer(self, "GET")
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                form = dict(parse_qsl(self.rfile.read(length).decode("utf-8"), keep_blank_values=True))
+                replay._answer(self, "POST", form)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # Several scraper processes (shards) connect at once; the default
+            # backlog of 5 drops connections the real sites would take
+            request_queue_size = 128
+
+        self._server = Server(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}"
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def browser_replay_hook(base_url):
+    # browser_session context hook: send every browser request to the replay server
+    async def hook(context):
+        async def handler(route):
+            request = route.request
+            if request.url.startswith(base_url):
+                await route.fallback()
+                return
+            host, path = split_url(request.url)
+            try:
+                response = await route.fetch(url=f"{base_url}/{host}{path}")
+                await route.fulfill(response=response)
+            except Exception:
+                await route.abort()
+        await context.route("**/*", handler)
+    return hook
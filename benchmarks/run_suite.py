@@ -0,0 +1,148 @@
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from _standin import ROOT
+
+from replay import RECORDINGS, Recording, ReplayServer, browser_replay_hook
+
+RESULTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results.jsonl")
+
+TARGETS = ["commodityonline", "commoditymarketlive", "agmarknet", "mandiprices", "scrape_all"]
+
+
+def percentiles(values, points=(50, 90, 99)):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    return {f"p{p}": round(ordered[min(len(ordered) - 1, int(len(ordered) * p / 100))], 4) for p in points}
+
+
+def child_env(replay_url, docs_dir):
+    return {
+        **os.environ,
+        "REPLAY_URL": replay_url,
+        "COMMODITYONLINE_BASE_URL": f"{replay_url}/www.commodityonline.com",
+        "COMMODITYMARKETLIVE_BASE_URL": f"{replay_url}/www.commoditymarketlive.com",
+        "AGMARKNET_URL": f"{replay_url}/agmarknet.gov.in/",
+        "AGMARKNET_USE_PROXY": "0",
+        "SCRAPER_DOCS_DIR": docs_dir,
+        "SCRAPER_JOURNAL": "0",
+        # Benchmarks read the trace next to the outputs they compare
+        "SCRAPER_TRACE_DIR": docs_dir,
+        # Replayed prices stay out of the real archive in .cache/columns
+        "SCRAPER_PRICE_COLUMNS_DIR": os.path.join(docs_dir, "columns"),
+        "PYTHONIOENCODING": "utf-8",
+    }
+
+
+async def run_target(target):
+    if target == "commodityonline":
+        import scrape_commodityonline_com
+        return await scrape_commodityonline_com.scrape_all_states()
+    if target == "commoditymarketlive":
+        import scrape_commoditymarketlive_com
+        return await scrape_commoditymarketlive_com.scrape_all_states()
+    if target == "agmarknet":
+        import scrape_agmarknet_gov_in
+        return await scrape_agmarknet_gov_in.scrape_all_states()
+    if target == "mandiprices":
+        import scrape_mandiprices_in
+        return await scrape_mandiprices_in.scrape_mandiprices(return_results=True)
+    raise ValueError(target)
+
+
+def child(target):
+    # Runs one entry point in this fresh process and prints its metrics as the last line
+    import browser_session
+    import http_fast_path
+
+    browser_session.context_hooks.append(browser_replay_hook(os.environ["REPLAY_URL"]))
+    error = None
+    start = time.perf_counter()
+    with browser_session.RssSampler(interval=0.2) as rss:
+        try:
+            if target == "scrape_all":
+                import scrape_all
+                scrape_all.main()
+                ok = any(scrape_all.results.values())
+            else:
+                ok = bool(asyncio.run(run_target(target)))
+        except Exception as e:
+            ok, error = False, str(e)
+    wall = time.perf_counter() - start
+    own = resource.getrusage(resource.RUSAGE_SELF)
+    kids = resource.getrusage(resource.RUSAGE_CHILDREN)
+    print("RESULT " + json.dumps({
+        "ok": ok,
+        "error": error,
+        "wall_s": round(wall, 3),
+        "cpu_s": round(own.ru_utime + own.ru_stime + kids.ru_utime + kids.ru_stime, 3),
+        "peak_rss_mb": round(rss.peak_kb / 1024, 1),
+        "state_latency_s": percentiles(list(http_fast_path.fetch_timings.values())),
+        "browser_launches": len(browser_session.launch_times),
+    }), flush=True)
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run every scraper offline against replayed recordings")
+    parser.add_argument("--recordings", default=RECORDINGS)
+    parser.add_argument("--targets", default=",".join(TARGETS))
+    parser.add_argument("--latency", default="0.05:0.3", help="min:max injected latency per request, seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default=RESULTS)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child)
+        return
+
+    low, high = (float(x) for x in args.latency.split(":"))
+    server = ReplayServer(Recording(args.recordings), latency=(low, high),
+                          failure_rate=args.failure_rate, seed=args.seed).start()
+    results = {}
+    try:
+        for target in args.targets.split(","):
+            with tempfile.TemporaryDirectory() as docs_dir:
+                proc = subprocess.run(
+                    [sys.executable, os.path.abspath(__file__), "--child", target],
+                    cwd=ROOT, env=child_env(server.base_url, docs_dir), capture_output=True, text=True, encoding="utf-8",
+                )
+            lines = [line for line in proc.stdout.splitlines() if line.startswith("RESULT ")]
+            results[target] = json.loads(lines[-1][7:]) if lines else {"ok": False, "error": proc.stderr.strip()[-500:]}
+            r = results[target]
+            print(f"{target:<20} ok={str(r['ok']):<5} wall={r.get('wall_s', 0):7.2f}s cpu={r.get('cpu_s', 0):6.2f}s "
+                  f"rss={r.get('peak_rss_mb', 0):6.0f}MB latency={r.get('state_latency_s', {})}", flush=True)
+    finally:
+        server.stop()
+
+    record = {
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "commit": git_commit(),
+        "settings": {"latency": [low, high], "failure_rate": args.failure_rate, "seed": args.seed},
+        "replay": server.stats,
+        "results": results,
+    }
+    with open(args.out, "a", encoding="utf-8") as f:
+        f.write(json.dumps(record) + "\n")
+    print(f"Results appended to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from contextlib import AsyncExitStack, asynccontextmanager
+
+import tracing
+
+# Launch duration in seconds of every Chromium started in this process
+launch_times = []
+
+# async callables run on every new context before a scraper uses it (recording, replay)
+context_hooks = []
+
+# off: every context starts empty; storage: cookies and localStorage are kept
+# per source (works with the shared browser); profile: a whole Chromium
+# profile per source, which also keeps its HTTP disk cache (JS bundles)
+BROWSER_STATE = os.getenv("SCRAPER_BROWSER_STATE", "off")
+BROWSER_STATE_DIR = os.getenv("SCRAPER_BROWSER_STATE_DIR", os.path.join(".cache", "browser"))
+# Saved state older than this (seconds) starts cold
+BROWSER_STATE_TTL = float(os.getenv("SCRAPER_BROWSER_STATE_TTL", str(7 * 24 * 3600)))
+
+
+async def launch_browser(p, **launch_options):
+    start = time.perf_counter()
+    with tracing.span("browser.launch"):
+        browser = await p.chromium.launch(**launch_options)
+    launch_times.append(time.perf_counter() - start)
+    return browser
+
+
+class SharedBrowser:
+    # One Chromium for every source of a run, started by the first
+    # browser_context() that needs it: a run whose sources all get by over
+    # HTTP never launches it. A failed launch is kept and re-raised, so only
+    # the sources that do need a browser fail, and without retrying it each
+    def __init__(self, **launch_options):
+        self.launch_options = launch_options
+        self._playwright = None
+        self._browser = None
+        self._error = None
+        self._lock = asyncio.Lock()
+
+    async def get(self):
+        async with self._lock:
+            if self._error is not None:
+                raise self._error
+            if self._browser is None:
+                from playwright.async_api import async_playwright
+
+                try:
+                    self._playwright = await async_playwright().start()
+                    self._browser = await launch_browser(self._playwright, **self.launch_options)
+                except Exception as e:
+                    self._error = e
+                    await self.close()
+                    raise
+            return self._browser
+
+    async def close(self):
+        browser, playwright = self._browser, self._playwright
+        self._browser = self._playwright = None
+        if browser is not None:
+            await browser.close()
+        if playwright is not None:
+            await playwright.stop()
+
+
+class BrowserState:
+    # What one source keeps of its browser between runs, under
+    # BROWSER_STATE_DIR/<source>. `layout` is whatever the scraper depends on
+    # (selectors, page scripts): saved state is dropped when it changes, when
+    # it is older than BROWSER_STATE_TTL, or when a run that used it failed
+    def __init__(self, source, *layout, mode=None, root=None, ttl=None):
+        self.source = source
+        self.mode = mode or BROWSER_STATE
+        self.layout = hashlib.sha256("\0".join(layout).encode("utf-8")).hexdigest()[:16]
+        self.ttl = BROWSER_STATE_TTL if ttl is None else ttl
+        self.dir = os.path.join(root or BROWSER_STATE_DIR, source)
+        self.storage_path = os.path.join(self.dir, "storage_state.json")
+        self.profile_dir = os.path.join(self.dir, "profile")
+        self.meta_path = os.path.join(self.dir, "meta.json")
+
+    @property
+    def enabled(self):
+        return self.mode in ("storage", "profile")
+
+    def is_warm(self):
+        try:
+            with open(self.meta_path, encoding="utf-8") as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return False
+        saved = self.storage_path if self.mode == "storage" else self.profile_dir
+        return (
+            meta.get("layout") == self.layout
+            and meta.get("mode") == self.mode
+            and time.time() - meta.get("saved_at", 0) < self.ttl
+            and os.path.exists(saved)
+        )
+
+    def invalidate(self):
+        shutil.rmtree(self.dir, ignore_errors=True)
+
+    async def save(self, context):
+        # Storage mode writes cookies + localStorage; a profile is written by
+        # Chromium itself, so only the marker is needed
+        os.makedirs(self.dir, exist_ok=True)
+        if self.mode == "storage":
+            await context.storage_state(path=f"{self.storage_path}.tmp")
+            os.replace(f"{self.storage_path}.tmp", self.storage_path)
+        with open(self.meta_path, "w", encoding="utf-8") as f:
+            json.dump({"layout": self.layout, "mode": self.mode, "saved_at": time.time()}, f)
+
+
+@asynccontextmanager
+async def browser_context(browser=None, launch_options=None, state=None, **context_options):
+    # With a shared browser only a fresh context is opened (and closed afterwards);
+    # without one the scraper starts and owns its own Chromium as before. A
+    # SharedBrowser is launched here, by the first context that asks for it.
+    # With an enabled BrowserState the context starts from what the source
+    # saved last time and saves back on a clean exit. A profile needs a
+    # Chromium of its own, so in profile mode a shared browser is not used
+    state = state if state is not None and state.enabled else None
+    warm = state.is_warm() if state else False
+    if state and not warm:
+        state.invalidate()
+    if state:
+        tracing.count("browser_state", source=state.source, state="warm" if warm else "cold")
+
+    # Playwright is imported by the first source that opens a context, not at startup
+    from playwright.async_api import async_playwright
+
+    async with AsyncExitStack() as stack:
+        if state and state.mode == "profile":
+            p = await stack.enter_async_context(async_playwright())
+            start = time.perf_counter()
+            with tracing.span("browser.launch", profile="warm" if warm else "cold"):
+                context = await p.chromium.launch_persistent_context(
+                    state.profile_dir, **(launch_options or {}), **context_options)
+            launch_times.append(time.perf_counter() - start)
+        else:
+            if isinstance(browser, SharedBrowser):
+                browser = await browser.get()
+            if browser is None:
+                p = await stack.enter_async_context(async_playwright())
+                browser = await launch_browser(p, **(launch_options or {}))
+                stack.push_async_callback(browser.close)
+            if warm:
+                context_options = {**context_options, "storage_state": state.storage_path}
+            with tracing.span("browser.context"):
+                context = await browser.new_context(**context_options)
+        stack.push_async_callback(context.close)
+        for hook in context_hooks:
+            await hook(context)
+        try:
+            yield context
+        except Exception:
+            # Whatever the site changed may be baked into the saved state
+            if state:
+                state.invalidate()
+            raise
+        if state:
+            try:
+                await state.save(context)
+            except Exception as e:
+                print(f"Could not save {state.source} browser state: {e}", flush=True)
+                state.invalidate()
+
+
+def _tree_rss_kb(root_pid):
+    # Sum VmRSS of a process and all of its descendants (Linux /proc only)
+    children = {}
+    rss = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/status", encoding="utf-8") as f:
+                fields = dict(line.split(":", 1) for line in f if ":" in line)
+        except OSError:
+            continue
+        pid = int(entry)
+        children.setdefault(int(fields.get("PPid", "0").strip()), []).append(pid)
+        rss[pid] = int(fields.get("VmRSS", "0 kB").split()[0])
+
+    total = 0
+    stack = [root_pid]
+    while stack:
+        pid = stack.pop()
+        total += rss.get(pid, 0)
+        stack.extend(children.get(pid, []))
+    return total
+
+
+class RssSampler:
+    # Samples the RSS of this process plus every browser it spawned in a background thread
+    def __init__(self, interval=0.5):
+        self.interval = interval
+        self.peak_kb = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def sample(self):
+        if os.path.isdir("/proc"):
+            self.peak_kb = max(self.peak_kb, _tree_rss_kb(os.getpid()))
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.sample()
@@ -0,0 +1,56 @@
+import os
+
+# Everything the sources need to find a commodity: the display label used by
+# mandiprices and in grid cells, and agmarknet's #ddlCommodity option value.
+# The key doubles as the URL slug on commodityonline and commoditymarketlive
+COMMODITIES = {
+    "potato": {"label": "Potato", "agmarknet": "24"},
+    "onion": {"label": "Onion", "agmarknet": "23"},
+    "tomato": {"label": "Tomato", "agmarknet": "78"},
+}
+
+# The commodity the scrapers were written for; its outputs keep their old names
+DEFAULT_COMMODITY = "potato"
+
+
+def parse_list(text):
+    names = []
+    for name in (text or "").split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in COMMODITIES:
+            raise ValueError(f"Unknown commodity '{name}' (known: {', '.join(COMMODITIES)})")
+        if name not in names:
+            names.append(name)
+    return names or [DEFAULT_COMMODITY]
+
+
+# Commodities fetched per run, e.g. SCRAPER_COMMODITIES=potato,onion,tomato
+SELECTED = parse_list(os.getenv("SCRAPER_COMMODITIES", DEFAULT_COMMODITY))
+
+
+def label(name):
+    return COMMODITIES[name]["label"]
+
+
+def agmarknet_value(name):
+    return COMMODITIES[name]["agmarknet"]
+
+
+def from_label(text):
+    # Commodity cell text from a grid ("Potato", " onion ") back to its key
+    text = (text or "").strip().lower()
+    for name, info in COMMODITIES.items():
+        if text in (name, info["label"].lower()):
+            return name
+    return None
+
+
+def output_name(name, commodity):
+    # result_agmarknet_gov_in.json -> result_agmarknet_gov_in_onion.json; the
+    # default commodity keeps the unsuffixed name the site already publishes
+    if commodity == DEFAULT_COMMODITY:
+        return name
+    stem, ext = os.path.splitext(name)
+    return f"{stem}_{commodity}{ext}"
@@ -0,0 +1,70 @@
+import itertools
+import os
+import shutil
+import time
+
+import tracing
+
+# Failure captures (screenshots, page HTML, HARs) kept as a ring: once the
+# directory holds more than DEBUG_MAX_BYTES the oldest captures are dropped.
+# The ring owns everything in it, so it is a directory of its own and never
+# debug/ itself, whose tracked files would be the oldest ones
+DEBUG_DIR = os.getenv("SCRAPER_DEBUG_DIR", os.path.join("debug", "captures"))
+DEBUG_MAX_BYTES = int(os.getenv("SCRAPER_DEBUG_MAX_BYTES", str(20 * 1024 * 1024)))
+
+
+class DebugRing:
+    def __init__(self, root=DEBUG_DIR, max_bytes=DEBUG_MAX_BYTES):
+        self.root = root
+        self.max_bytes = max_bytes
+        self._seq = itertools.count()
+
+    def path(self, name):
+        # Fresh file name that sorts by capture time, e.g. 20261017T120301-0-agmarknet_attempt_2.png
+        os.makedirs(self.root, exist_ok=True)
+        return os.path.join(self.root, f"{time.strftime('%Y%m%dT%H%M%S')}-{next(self._seq)}-{name}")
+
+    def trim(self):
+        # Drop the oldest files until the ring fits; the newest always stays
+        entries = []
+        for entry in os.scandir(self.root):
+            if entry.is_file():
+                stat = entry.stat()
+                entries.append((stat.st_mtime, entry.name, stat.st_size, entry.path))
+        entries.sort()
+        total = sum(size for _, _, size, _ in entries)
+        for _, _, size, path in entries[:-1]:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+        return total
+
+    def add_file(self, source, name):
+        # Move an existing file (a finished HAR) into the ring
+        path = self.path(name)
+        shutil.move(source, path)
+        self.trim()
+        return path
+
+    async def capture_page(self, page, name):
+        # Screenshot plus HTML of a page that just failed; a page too broken
+        # to capture is skipped rather than failing the retry loop
+        saved = []
+        with tracing.span("debug.capture"):
+            try:
+                path = self.path(f"{name}.png")
+                await page.screenshot(path=path, full_page=True, timeout=10000)
+                saved.append(path)
+                path = self.path(f"{name}.html")
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write(await page.content())
+                saved.append(path)
+            except Exception as e:
+                print(f"Debug capture '{name}' failed: {e}", flush=True)
+        if saved:
+            self.trim()
+        return saved
@@ -0,0 +1,117 @@
+import hashlib
+import json
+import os
+import threading
+
+# Written next to the outputs whenever a run changed any of them: which
+# states and fields moved, so a client can poll this one small file instead
+# of re-downloading every output and its history
+DELTA_FILE = "delta.json"
+
+PRICE_FIELDS = ("Minimum_Price", "Maximum_Price", "Current_Price")
+
+
+def _normalize(value):
+    # 850.0 and 850 are the same price whichever source rounded it
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    return value
+
+
+def canonical(data):
+    # Key order, whitespace and float formatting do not count as a change
+    return json.dumps(_normalize(data), sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def content_hash(data):
+    return hashlib.sha256(canonical(data).encode("utf-8")).hexdigest()
+
+
+def diff_states(old, new, fields=PRICE_FIELDS):
+    # {state: {field: new value}} for every state whose prices moved between
+    # two per-state outputs; a state that is no longer published maps to None
+    before = {record.get("State"): _normalize(record) for record in old or [] if record.get("State")}
+    changes = {}
+    for record in new or []:
+        state = record.get("State")
+        if not state:
+            continue
+        current = _normalize(record)
+        previous = before.pop(state, {})
+        moved = {field: current.get(field) for field in fields if current.get(field) != previous.get(field)}
+        if moved:
+            changes[state] = moved
+    for state in before:
+        changes[state] = None
+    return changes
+
+
+class DeltaPublisher:
+    # Change-detecting writer for the docs directory. An output whose data
+    # hashes the same as what it last published is not written at all (no new
+    # history partition, no rewritten view); every one that did change lands
+    # in this run's delta
+    def __init__(self, root):
+        self.root = root
+        self.outputs = {}
+        self.unchanged = []
+        self._lock = threading.Lock()
+
+    def save(self, history, name, data):
+        # history.save() unless the data matches the output's newest partition;
+        # retention runs either way
+        history.import_view(name, os.path.join(self.root, name))
+        previous = history.latest(name)
+        digest = content_hash(data)
+        if previous is not None and content_hash(previous) == digest:
+            history.retain(name, self.root)
+            with self._lock:
+                self.unchanged.append(name)
+            return False
+        history.save(name, data, self.root)
+        with self._lock:
+            self.outputs[name] = {"date": history.today.isoformat(), "hash": digest, "states": diff_states(previous, data)}
+        return True
+
+    def write_json(self, name, data, stable=None):
+        # Rewrites docs/<name> only if `stable` (default: the data itself)
+        # hashes differently from what the file holds now
+        path = os.path.join(self.root, name)
+        stable = stable or (lambda value: value)
+        try:
+            with open(path, encoding="utf-8") as f:
+                if content_hash(stable(json.load(f))) == content_hash(stable(data)):
+                    return False
+        except (OSError, ValueError):
+            pass
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+        return True
+
+    @property
+    def changed(self):
+        return bool(self.outputs)
+
+    def write_delta(self, run_time):
+        # delta.json for this run, chained to the previous one: a client that
+        # last saw `previous_run` can apply this delta, any other client
+        # re-downloads the outputs it needs. Nothing is written for a run that
+        # changed nothing
+        if not self.outputs:
+            return None
+        path = os.path.join(self.root, DELTA_FILE)
+        try:
+            with open(path, encoding="utf-8") as f:
+                previous_run = json.load(f).get("run")
+        except (OSError, ValueError, AttributeError):
+            previous_run = None
+        delta = {"run": run_time, "previous_run": previous_run, "outputs": self.outputs}
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(delta, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(f"{path}.tmp", path)
+        return path
@@ -0,0 +1,79 @@
+import difflib
+import json
+import os
+from collections import Counter
+from functools import lru_cache
+
+import numpy as np
+
+DATA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "Indian-states-districts.json")
+
+
+class CloseMatcher:
+    # Gives the same answer as difflib.get_close_matches(word, choices, n=1, cutoff=cutoff)[0],
+    # but only runs SequenceMatcher.ratio() on choices that can still reach the cutoff.
+    # A character-count index over all choices evaluates difflib's own upper bound
+    # (quick_ratio: shared characters regardless of order) for every choice in one numpy pass.
+    def __init__(self, choices, cutoff):
+        self.cutoff = cutoff
+        self.choices = list(dict.fromkeys(choices))
+        self.alphabet = {ch: i for i, ch in enumerate(sorted({ch for c in self.choices for ch in c}))}
+        self.lengths = np.array([len(c) for c in self.choices], dtype=np.int64)
+        self.counts = np.zeros((len(self.choices), len(self.alphabet)), dtype=np.int64)
+        for row, choice in enumerate(self.choices):
+            for ch, n in Counter(choice).items():
+                self.counts[row, self.alphabet[ch]] = n
+
+    def best(self, word):
+        if not self.choices:
+            return None
+        query = np.zeros(len(self.alphabet), dtype=np.int64)
+        for ch, n in Counter(word).items():
+            if ch in self.alphabet:
+                query[self.alphabet[ch]] = n
+        matches = np.minimum(self.counts, query).sum(axis=1)
+        # Same float expression as difflib's _calculate_ratio, so the pruning is exact
+        bounds = 2.0 * matches / (len(word) + self.lengths)
+
+        matcher = difflib.SequenceMatcher()
+        matcher.set_seq2(word)
+        best = None
+        for index in np.flatnonzero(bounds >= self.cutoff):
+            choice = self.choices[index]
+            matcher.set_seq1(choice)
+            score = matcher.ratio()
+            # get_close_matches keeps the largest (score, choice) pair
+            if score >= self.cutoff and (best is None or (score, choice) > best):
+                best = (score, choice)
+        return best[1] if best else None
+
+
+class DistrictResolver:
+    # Built once per run: exact map of normalized district names, the fuzzy candidate
+    # index above, and an LRU of every name already resolved (grids repeat districts a lot)
+    def __init__(self, state_district_data, cutoff=0.7, cache_size=4096):
+        self.district_to_state = {}
+        for entry in state_district_data:
+            state = entry.get("name", "").strip()
+            for district in entry.get("districts", []):
+                district_lower = district.strip().lower()
+                if district_lower:
+                    self.district_to_state[district_lower] = state
+        self.matcher = CloseMatcher(self.district_to_state, cutoff)
+        self.resolve_normalized = lru_cache(maxsize=cache_size)(self._resolve_normalized)
+
+    def _resolve_normalized(self, name):
+        if name in self.district_to_state:
+            return self.district_to_state[name]
+        match = self.matcher.best(name)
+        return self.district_to_state[match] if match else "Unknown"
+
+    def resolve(self, district_name):
+        if not district_name:
+            return "Unknown"
+        return self.resolve_normalized(district_name.strip().lower())
+
+
+def load_resolver(path=DATA_PATH, **kwargs):
+    with open(path, "r", encoding="utf-8") as f:
+        return DistrictResolver(json.load(f), **kwargs)
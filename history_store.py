@@ -0,0 +1,185 @@
+import datetime
+import json
+import os
+
+# Defaults to <docs dir>/history: the partitions and index.json are what gets
+# published, so a run commits one small file per output that changed
+HISTORY_DIR = os.getenv("SCRAPER_HISTORY_DIR")
+# Days of history kept on disk and in the 30-day views
+RETENTION_DAYS = int(os.getenv("SCRAPER_HISTORY_DAYS", "30"))
+# Whether save() also keeps the {date: data} views (docs/<name>) up to date.
+# They are generated from the partitions for local use and are not committed;
+# the publish workflow turns them off
+VIEWS = os.getenv("SCRAPER_HISTORY_VIEWS", "1") != "0"
+INDEX_FILE = "index.json"
+
+
+def _write(path, text):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(text)
+    os.replace(tmp, path)
+
+
+def _read(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+class HistoryStore:
+    # One compact <YYYY-MM-DD>.json partition per output per day under
+    # <root>/<name>/. A run only ever writes today's partition, so its cost does
+    # not depend on how many days are kept; the old {date: data} files become
+    # views rebuilt from the partitions when one of them changed (with views on).
+    # A day is only stored when the output changed: a date missing from the
+    # partitions, a view or index.json means the newest earlier date still held
+    def __init__(self, root, retention_days=RETENTION_DAYS, today=None, views=None):
+        self.root = root
+        self.retention_days = retention_days
+        self.today = today or datetime.date.today()
+        self.views = VIEWS if views is None else views
+        self.writes = []
+
+    def _dir(self, name):
+        return os.path.join(self.root, os.path.splitext(name)[0])
+
+    def partitions(self, name):
+        # {date: path} for every well-formed partition of this output
+        found = {}
+        directory = self._dir(name)
+        if not os.path.isdir(directory):
+            return found
+        for entry in os.listdir(directory):
+            stem, ext = os.path.splitext(entry)
+            if ext != ".json":
+                continue
+            try:
+                found[datetime.date.fromisoformat(stem)] = os.path.join(directory, entry)
+            except ValueError:
+                continue
+        return found
+
+    def _expired(self, day):
+        return (self.today - day).days > self.retention_days
+
+    def import_view(self, name, view_path):
+        # Seed the partitions from an existing {date: data} view the first time
+        # an output is stored, so history written before the store is not lost
+        if os.path.isdir(self._dir(name)) or not os.path.exists(view_path):
+            return
+        try:
+            with open(view_path, encoding="utf-8") as f:
+                existing = json.load(f)
+        except (OSError, ValueError):
+            return
+        if not isinstance(existing, dict):
+            return
+        days = {}
+        for key, data in existing.items():
+            try:
+                days[datetime.date.fromisoformat(key)] = data
+            except ValueError:
+                continue
+        # The newest day is kept however old, like compact() keeps it
+        newest = max(days, default=None)
+        os.makedirs(self._dir(name), exist_ok=True)
+        for day, data in days.items():
+            if not self._expired(day) or day == newest:
+                self.append(name, data, day)
+
+    def append(self, name, data, day=None):
+        # Write the day's partition; a second run on the same day replaces it.
+        # Returns False when the partition already held exactly this data
+        day = day or self.today
+        os.makedirs(self._dir(name), exist_ok=True)
+        path = os.path.join(self._dir(name), f"{day.isoformat()}.json")
+        text = json.dumps(data, separators=(",", ":"), ensure_ascii=False)
+        if _read(path) == text:
+            return False
+        _write(path, text)
+        self.writes.append(path)
+        return True
+
+    def load(self, name, day=None):
+        # The day's partition (today's by default), or None if there is none
+        text = _read(os.path.join(self._dir(name), f"{(day or self.today).isoformat()}.json"))
+        try:
+            return json.loads(text) if text is not None else None
+        except ValueError:
+            return None
+
+    def latest(self, name):
+        # Data of the newest partition, i.e. what this output last published
+        partitions = self.partitions(name)
+        return self.load(name, max(partitions)) if partitions else None
+
+    def compact(self, name):
+        # Retention is a directory listing plus one unlink per expired day. The
+        # newest partition always stays: unchanged data adds no new one, so it
+        # may be older than the retention and still be current
+        dropped = 0
+        partitions = self.partitions(name)
+        newest = max(partitions, default=None)
+        for day, path in partitions.items():
+            if self._expired(day) and day != newest:
+                os.remove(path)
+                dropped += 1
+        return dropped
+
+    def render_view(self, name, view_path):
+        # {date: data} over the kept days; a date without a partition is
+        # absent (the output did not change), not empty
+        view = {}
+        partitions = self.partitions(name)
+        newest = max(partitions, default=None)
+        for day, path in sorted(partitions.items()):
+            if self._expired(day) and day != newest:
+                continue
+            with open(path, encoding="utf-8") as f:
+                view[day.isoformat()] = json.load(f)
+        _write(view_path, json.dumps(view, separators=(",", ":"), ensure_ascii=False))
+        self.writes.append(view_path)
+
+    def _refresh_view(self, name, view_dir, changed):
+        view_path = os.path.join(view_dir, name)
+        if self.views and (changed or not os.path.exists(view_path)):
+            self.render_view(name, view_path)
+
+    def save(self, name, data, view_dir):
+        # Drop-in replacement for the old save_with_date: append today's
+        # partition, compact, and rebuild docs/<name> only if something moved
+        self.import_view(name, os.path.join(view_dir, name))
+        changed = self.append(name, data)
+        changed = self.compact(name) > 0 or changed
+        self._refresh_view(name, view_dir, changed)
+        return changed
+
+    def retain(self, name, view_dir):
+        # Retention alone, for a run with nothing new to store: expired days
+        # still leave the partitions and docs/<name>
+        dropped = self.compact(name) > 0
+        self._refresh_view(name, view_dir, dropped)
+        return dropped
+
+    def write_index(self):
+        # <root>/index.json, {"outputs": {name: [days]}, "fill": "forward"}, for
+        # clients that read the partitions; "fill" spells out that a missing
+        # day carries the previous listed day's data. Rewritten only when a day
+        # came or went
+        outputs = {}
+        if os.path.isdir(self.root):
+            for entry in sorted(os.listdir(self.root)):
+                days = self.partitions(f"{entry}.json")
+                if days:
+                    outputs[f"{entry}.json"] = [day.isoformat() for day in sorted(days)]
+        path = os.path.join(self.root, INDEX_FILE)
+        text = json.dumps({"outputs": outputs, "fill": "forward"}, separators=(",", ":"), ensure_ascii=False)
+        if _read(path) == text:
+            return False
+        os.makedirs(self.root, exist_ok=True)
+        _write(path, text)
+        self.writes.append(path)
+        return True
@@ -0,0 +1,176 @@
+import asyncio
+import html
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+
+from bs4 import BeautifulSoup
+
+import tracing
+
+try:
+    import lxml.html
+    from lxml.cssselect import CSSSelector
+except ImportError:  # lxml.cssselect also needs the cssselect package
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+# html.parser (BeautifulSoup, always available), lxml or selectolax
+BACKEND = os.getenv("SCRAPER_HTML_PARSER", "html.parser")
+
+# inline: parse on the event loop; thread / process: hand parsing to a pool so the loop keeps running
+EXECUTOR = os.getenv("SCRAPER_PARSE_EXECUTOR", "inline")
+WORKERS = int(os.getenv("SCRAPER_PARSE_WORKERS", "0")) or min(4, os.cpu_count() or 1)
+
+
+class SoupBackend:
+    name = "html.parser"
+
+    def parse(self, html):
+        return BeautifulSoup(html, "html.parser")
+
+    def select(self, node, css):
+        return node.select(css)
+
+    def find(self, node, tag):
+        return node.find(tag)
+
+    def text(self, node):
+        return node.get_text()
+
+    def stripped_text(self, node):
+        # Every text node stripped, then joined with nothing in between
+        return node.get_text(strip=True)
+
+    def inner_html(self, node):
+        return node.decode_contents()
+
+
+class LxmlBackend:
+    name = "lxml"
+
+    def parse(self, html):
+        return lxml.html.document_fromstring(html)
+
+    def select(self, node, css):
+        return _compiled_css(css)(node)
+
+    def find(self, node, tag):
+        return next(node.iterdescendants(tag), None)
+
+    def text(self, node):
+        return node.text_content()
+
+    def stripped_text(self, node):
+        return "".join(t.strip() for t in node.xpath(".//text()"))
+
+    def inner_html(self, node):
+        # node.text is unescaped; the children (and their tails) come back as markup
+        return html.escape(node.text or "", quote=False) + "".join(
+            lxml.html.tostring(child, encoding="unicode") for child in node)
+
+
+@lru_cache(maxsize=64)
+def _compiled_css(css):
+    # Compiling a selector to XPath costs more than running it on a small node
+    return CSSSelector(css)
+
+
+class SelectolaxBackend:
+    name = "selectolax"
+
+    def parse(self, html):
+        return LexborHTMLParser(html)
+
+    def select(self, node, css):
+        return node.css(css)
+
+    def find(self, node, tag):
+        return node.css_first(tag)
+
+    def text(self, node):
+        return node.text(deep=True, separator="", strip=False)
+
+    def stripped_text(self, node):
+        return node.text(deep=True, separator="", strip=True)
+
+    def inner_html(self, node):
+        return node.inner_html
+
+
+BACKENDS = {"html.parser": SoupBackend}
+if lxml is not None:
+    BACKENDS["lxml"] = LxmlBackend
+if LexborHTMLParser is not None:
+    BACKENDS["selectolax"] = SelectolaxBackend
+
+_backends = {}
+
+
+def get_backend(name=None):
+    name = name or BACKEND
+    if name not in BACKENDS:
+        print(f"⚠️ HTML parser '{name}' is not installed, using html.parser", flush=True)
+        name = "html.parser"
+    if name not in _backends:
+        _backends[name] = BACKENDS[name]()
+    return _backends[name]
+
+
+def inner_html(html, selector, backend=None):
+    # Inner HTML of the first element matching selector, or None
+    b = get_backend(backend)
+    nodes = b.select(b.parse(html), selector)
+    return b.inner_html(nodes[0]) if nodes else None
+
+
+def table_rows(html, row_selector, cell_selector="td", backend=None):
+    # Raw text of every cell, row by row
+    b = get_backend(backend)
+    return [[b.text(cell) for cell in b.select(row, cell_selector)] for row in b.select(b.parse(html), row_selector)]
+
+
+def grid(html, backend=None):
+    # ASP.NET GridView: headers from the th cells, stripped cell texts of every row after the first
+    b = get_backend(backend)
+    doc = b.parse(html)
+    headers = [b.text(th).strip() for th in b.select(doc, "tr th")]
+    rows = [[b.text(td).strip() for td in b.select(tr, "td")] for tr in b.select(doc, "tr")[1:]]
+    return headers, rows
+
+
+def labelled_values(html, card_selector, label_tag, value_tag, backend=None):
+    # (label, value) pairs from cards that contain both tags, texts stripped like get_text(strip=True)
+    b = get_backend(backend)
+    pairs = []
+    for card in b.select(b.parse(html), card_selector):
+        label = b.find(card, label_tag)
+        value = b.find(card, value_tag)
+        if label is not None and value is not None:
+            pairs.append((b.stripped_text(label), b.stripped_text(value)))
+    return pairs
+
+
+_pool = None
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        if EXECUTOR == "process":
+            _pool = ProcessPoolExecutor(max_workers=WORKERS)
+        else:
+            _pool = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix="parse")
+    return _pool
+
+
+async def parse_off_loop(func, *args):
+    # func must be a module-level function for the process pool (it is pickled by name)
+    with tracing.span("parse", parser=func.__name__):
+        if EXECUTOR not in ("thread", "process"):
+            return func(*args)
+        return await asyncio.get_running_loop().run_in_executor(_executor(), partial(func, *args))
@@ -0,0 +1,160 @@
+import copy
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+ENABLED = os.getenv("SCRAPER_HTTP_CACHE", "1") != "0"
+CACHE_DIR = os.getenv("SCRAPER_HTTP_CACHE_DIR", os.path.join(".cache", "http"))
+# Seconds a stored page is served without asking the site again (0: always revalidate)
+CACHE_TTL = float(os.getenv("SCRAPER_HTTP_CACHE_TTL", "0"))
+CACHE_MAX_BYTES = int(os.getenv("SCRAPER_HTTP_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+
+def body_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def parser_namespace(name, *modules):
+    # "<name>@<hash of the modules' source>": a parse stored by an older
+    # version of the parser (or of anything it calls) is never served again
+    digest = hashlib.sha256()
+    for module in modules:
+        with open(module.__file__, "rb") as f:
+            digest.update(f.read())
+    return f"{name}@{digest.hexdigest()[:12]}"
+
+
+class HttpCache:
+    # One <sha256(url)>.body + .json pair per URL. The JSON keeps the validators
+    # (ETag / Last-Modified), the body hash, and parse results keyed by that hash
+    def __init__(self, root=CACHE_DIR, ttl=CACHE_TTL, max_bytes=CACHE_MAX_BYTES):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, url, ext):
+        return os.path.join(self.root, hashlib.sha256(url.encode("utf-8")).hexdigest() + ext)
+
+    def _write(self, path, data, mode="w"):
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def lookup(self, url):
+        try:
+            with open(self._path(url, ".json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            with open(self._path(url, ".body"), encoding="utf-8") as f:
+                return meta, f.read()
+        except (OSError, ValueError):
+            return None, None
+
+    def is_fresh(self, meta):
+        return self.ttl > 0 and time.time() - meta["stored_at"] < self.ttl
+
+    def conditional_headers(self, meta):
+        headers = {}
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+        return headers
+
+    def store(self, url, text, headers, previous=None):
+        digest = body_hash(text)
+        meta = {
+            "url": url,
+            "etag": headers.get("etag"),
+            "last_modified": headers.get("last-modified"),
+            "hash": digest,
+            "size": len(text.encode("utf-8")),
+            "stored_at": time.time(),
+            # Parse results stay valid as long as the body did not change
+            "parsed": previous["parsed"] if previous and previous.get("hash") == digest else {},
+        }
+        self._write(self._path(url, ".body"), text)
+        self._write(self._path(url, ".json"), json.dumps(meta))
+        self.count("unchanged_bodies" if previous and previous.get("hash") == digest else "changed_bodies")
+
+    def touch(self, url, meta):
+        meta["stored_at"] = time.time()
+        self._write(self._path(url, ".json"), json.dumps(meta))
+
+    def cached_parse(self, url, text, namespace):
+        # Result of a previous parse of exactly this body, or None
+        meta, _ = self.lookup(url)
+        entry = (meta or {}).get("parsed", {}).get(namespace)
+        if entry is None or meta["hash"] != body_hash(text):
+            self.count("parse_misses")
+            return None
+        self.count("parse_skips")
+        return copy.deepcopy(entry)
+
+    def remember_parse(self, url, text, namespace, result):
+        meta, _ = self.lookup(url)
+        if meta is None or meta["hash"] != body_hash(text):
+            return
+        # Parses by other versions of this parser are dead weight from now on
+        name = namespace.split("@")[0]
+        meta["parsed"] = {key: value for key, value in meta["parsed"].items() if key.split("@")[0] != name}
+        meta["parsed"][namespace] = result
+        self._write(self._path(url, ".json"), json.dumps(meta))
+
+    def evict(self):
+        # Drop least recently stored/revalidated pages until the cache fits in max_bytes
+        entries = []
+        for name in os.listdir(self.root):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.root, name)
+            try:
+                with open(path, encoding="utf-8") as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            entries.append((meta.get("stored_at", 0), meta.get("size", 0), path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            for p in (path, path[:-5] + ".body"):
+                try:
+                    os.remove(p)
+                except OSError:
+                    pass
+            total -= size
+            self.count("evicted")
+        return total
+
+    def summary(self):
+        with self._lock:
+            stats = dict(self.stats)
+        lookups = stats.get("fresh_hits", 0) + stats.get("revalidated", 0) + stats.get("misses", 0)
+        stats["hit_ratio"] = round((stats.get("fresh_hits", 0) + stats.get("revalidated", 0)) / lookups, 3) if lookups else None
+        return stats
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    # Process-wide cache, or None when disabled
+    global _cache
+    if not ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = HttpCache()
+        return _cache
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import time
+
+import tracing
+
+try:
+    import httpx
+except ImportError:  # fast path is optional, the scrapers fall back to Playwright
+    httpx = None
+
+USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+DEFAULT_CONCURRENCY = int(os.getenv("SCRAPER_HTTP_CONCURRENCY", "8"))
+
+# httpx response event hooks added to every client (recording)
+response_hooks = []
+
+# Seconds per URL fetched by fetch_all in this process
+fetch_timings = {}
+
+
+def enabled():
+    return httpx is not None and os.getenv("SCRAPER_HTTP_FAST_PATH", "1") != "0"
+
+
+def client(**kwargs):
+    kwargs.setdefault("headers", HEADERS)
+    kwargs["event_hooks"] = {"response": list(response_hooks)}
+    return httpx.AsyncClient(**kwargs)
+
+
+async def iter_fetch(urls, concurrency=None, timeout=15, cache=None):
+    # One pooled keep-alive client for every URL; yields (index into urls, body) as
+    # each response arrives, body None where the request failed or did not answer 200.
+    # With an http_cache.HttpCache, fresh pages are served from disk and stale ones
+    # revalidated with a conditional GET
+    concurrency = concurrency or DEFAULT_CONCURRENCY
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async with client(timeout=timeout, limits=limits, follow_redirects=True) as http:
+        async def fetch(url):
+            meta, cached = cache.lookup(url) if cache else (None, None)
+            if meta is not None and cache.is_fresh(meta):
+                cache.count("fresh_hits")
+                return cached
+
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    with tracing.span("http.get"):
+                        response = await http.get(url, headers=cache.conditional_headers(meta) if meta else None)
+                except httpx.HTTPError as e:
+                    print(f"HTTP fast path failed for {url}: {e}", flush=True)
+                    tracing.count("http_errors")
+                    return None
+                finally:
+                    fetch_timings[url] = time.perf_counter() - start
+                tracing.count("http_responses", status=response.status_code)
+                tracing.count("http_bytes", len(response.content))
+                if response.status_code == 304 and cached is not None:
+                    cache.count("revalidated")
+                    cache.touch(url, meta)
+                    return cached
+                if response.status_code != 200:
+                    print(f"HTTP fast path got {response.status_code} for {url}", flush=True)
+                    return None
+                if cache:
+                    cache.count("misses")
+                    cache.store(url, response.text, response.headers, meta)
+                return response.text
+
+        async def fetch_indexed(index, url):
+            # Whatever goes wrong with one URL (an invalid URL, a body that
+            # does not decode) only sends that page to the Playwright fallback
+            try:
+                return index, await fetch(url)
+            except Exception as e:
+                print(f"HTTP fast path failed for {url}: {type(e).__name__}: {e}", flush=True)
+                tracing.count("http_errors")
+                return index, None
+
+        tasks = [asyncio.ensure_future(fetch_indexed(index, url)) for index, url in enumerate(urls)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            # A consumer that stopped early leaves nothing running on a closed client
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    if cache:
+        cache.evict()
+
+
+async def fetch_all(urls, concurrency=None, timeout=15, cache=None):
+    # iter_fetch collected into a list of bodies in the order of urls
+    bodies = [None] * len(urls)
+    async for index, body in iter_fetch(urls, concurrency, timeout, cache):
+        bodies[index] = body
+    return bodies
@@ -0,0 +1,102 @@
+import os
+from collections import Counter
+from urllib.parse import urlparse
+
+# block: abort filtered requests; audit: let everything through but tally what would
+# have been blocked (to measure the bytes saved); off: no interception at all
+MODE = os.getenv("SCRAPER_NETWORK_POLICY", "block")
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+
+BLOCKED_DOMAINS = [
+    "google-analytics.com", "googletagmanager.com", "googlesyndication.com",
+    "googleadservices.com", "doubleclick.net", "adservice.google.com",
+    "amazon-adsystem.com", "facebook.net", "facebook.com", "connect.facebook.net",
+    "hotjar.com", "clarity.ms", "scorecardresearch.com", "quantserve.com",
+    "taboola.com", "outbrain.com", "criteo.com", "adnxs.com", "pubmatic.com",
+    "rubiconproject.com", "onesignal.com", "pushengage.com", "izooto.com",
+]
+
+# Types that third parties may only load when their host is on the source's allowlist
+SCRIPT_TYPES = {"script", "xhr", "fetch", "websocket", "eventsource"}
+
+
+def _host_matches(host, domains):
+    return any(host == d or host.endswith("." + d) for d in domains)
+
+
+class NetworkPolicy:
+    def __init__(self, source, allow_domains=(), allow_types=(), block_types=BLOCKED_RESOURCE_TYPES,
+                 block_domains=BLOCKED_DOMAINS, mode=None):
+        self.source = source
+        self.allow_domains = list(allow_domains)
+        self.block_types = set(block_types) - set(allow_types)
+        self.block_domains = list(block_domains)
+        self.mode = mode or MODE
+        self.blocked = Counter()
+        self.allowed_requests = 0
+        self.allowed_bytes = 0
+        self.blocked_bytes = 0
+
+    def reason_to_block(self, url, resource_type):
+        host = (urlparse(url).hostname or "").lower()
+        if resource_type == "document":
+            return None
+        if _host_matches(host, self.block_domains):
+            return "domain"
+        if resource_type in self.block_types:
+            return resource_type
+        if resource_type in SCRIPT_TYPES and self.allow_domains and not _host_matches(host, self.allow_domains):
+            return "third-party " + resource_type
+        return None
+
+    async def _route(self, route):
+        request = route.request
+        reason = self.reason_to_block(request.url, request.resource_type)
+        if reason and self.mode == "block":
+            self.blocked[reason] += 1
+            await route.abort()
+        else:
+            # fallback() hands the request to any other route handler (e.g. replay) or the network
+            await route.fallback()
+
+    async def _on_finished(self, request):
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return
+        size = sizes.get("responseBodySize", 0) + sizes.get("responseHeadersSize", 0)
+        reason = self.reason_to_block(request.url, request.resource_type)
+        if reason:
+            # Only reachable in audit mode: the request went through but would have been blocked
+            self.blocked[reason] += 1
+            self.blocked_bytes += size
+        else:
+            self.allowed_requests += 1
+            self.allowed_bytes += size
+
+    async def install(self, context):
+        if self.mode == "off":
+            return
+        await context.route("**/*", self._route)
+        context.on("requestfinished", self._on_finished)
+
+    def summary(self):
+        return {
+            "mode": self.mode,
+            "allowed_requests": self.allowed_requests,
+            "allowed_bytes": self.allowed_bytes,
+            "blocked_requests": sum(self.blocked.values()),
+            "blocked_bytes": self.blocked_bytes if self.mode == "audit" else None,
+            "blocked_by_reason": dict(self.blocked),
+        }
+
+    def report(self):
+        if self.mode == "off":
+            return
+        s = self.summary()
+        line = (f"🌐 {self.source}: allowed {s['allowed_requests']} requests / {s['allowed_bytes'] / 1024:.0f} KB, "
+                f"blocked {s['blocked_requests']} requests")
+        if self.mode == "audit":
+            line += f" / {self.blocked_bytes / 1024:.0f} KB (audit, not actually blocked)"
+        print(line, flush=True)
@@ -0,0 +1,228 @@
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+# Outlives the 30-day partitions, and stays out of the committed docs/ (the
+# binary month files would change on every run that ingests); the scrape
+# workflow keeps it between runs with actions/cache
+COLUMNS_DIR = os.getenv("SCRAPER_PRICE_COLUMNS_DIR", os.path.join(".cache", "columns"))
+
+FIELDS = ("current", "minimum", "maximum")
+RECORD_KEYS = {"current": "Current_Price", "minimum": "Minimum_Price", "maximum": "Maximum_Price"}
+DTYPES = {
+    "day": np.int32,  # days since 1970-01-01
+    "source": np.int16,
+    "state": np.int16,
+    "current": np.float32,
+    "minimum": np.float32,
+    "maximum": np.float32,
+}
+EPOCH = datetime.date(1970, 1, 1)
+
+
+def day_number(day):
+    if isinstance(day, str):
+        day = datetime.date.fromisoformat(day)
+    return (day - EPOCH).days
+
+
+def _month(day_no):
+    day = EPOCH + datetime.timedelta(days=int(day_no))
+    return f"{day.year:04d}-{day.month:02d}"
+
+
+def _price(value):
+    # The scrapers publish 0 or None for "no price"; both become NaN here
+    if isinstance(value, (int, float)) and value > 0:
+        return value
+    return np.nan
+
+
+class PriceColumns:
+    # date x source x state x {current, minimum, maximum} as one .npy file per
+    # column per month under <root>/<YYYY-MM>/, rows sorted by (day, source,
+    # state). Source and state names are small integer codes into vocab.json,
+    # which only ever grows so codes already on disk stay valid. A day holds
+    # what every output showed after that day's run, changed or not, so a
+    # day-level query sees every source; only days without a run are missing
+    def __init__(self, root):
+        self.root = root
+        self.added = False
+        self.vocab = {"sources": [], "states": []}
+        try:
+            with open(os.path.join(root, "vocab.json"), encoding="utf-8") as f:
+                self.vocab = json.load(f)
+        except (OSError, ValueError):
+            pass
+        self._codes = {kind: {name: i for i, name in enumerate(names)} for kind, names in self.vocab.items()}
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.root, "vocab.json"))
+
+    def code(self, kind, name):
+        codes = self._codes[kind]
+        if name not in codes:
+            codes[name] = len(self.vocab[kind])
+            self.vocab[kind].append(name)
+            self.added = True
+        return codes[name]
+
+    def months(self):
+        if not os.path.isdir(self.root):
+            return []
+        return sorted(entry for entry in os.listdir(self.root) if os.path.isdir(os.path.join(self.root, entry)))
+
+    def read_month(self, month, mmap_mode="r"):
+        directory = os.path.join(self.root, month)
+        return {name: np.load(os.path.join(directory, f"{name}.npy"), mmap_mode=mmap_mode) for name in DTYPES}
+
+    def _write_month(self, month, columns):
+        directory = os.path.join(self.root, month)
+        os.makedirs(directory, exist_ok=True)
+        for name, values in columns.items():
+            path = os.path.join(directory, f"{name}.npy")
+            with open(f"{path}.tmp", "wb") as f:
+                np.save(f, np.ascontiguousarray(values, dtype=DTYPES[name]))
+            os.replace(f"{path}.tmp", path)
+
+    def _write_vocab(self):
+        # Only when a new source or state got a code
+        if not self.added and self.exists():
+            return
+        self.added = False
+        os.makedirs(self.root, exist_ok=True)
+        path = os.path.join(self.root, "vocab.json")
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            json.dump(self.vocab, f, indent=2)
+        os.replace(f"{path}.tmp", path)
+
+    def ingest(self, day, outputs):
+        # outputs: {source: [{"State": ..., "Current_Price": ...}, ...]} for one
+        # day, i.e. what each output held after that day's run. Replaces
+        # whatever those sources had for that day; only the month the day
+        # falls in is rewritten
+        day_no = day_number(day)
+        rows = {name: [] for name in DTYPES}
+        for source, records in outputs.items():
+            source_code = self.code("sources", source)
+            for record in records or []:
+                state = record.get("State")
+                if not state:
+                    continue
+                rows["day"].append(day_no)
+                rows["source"].append(source_code)
+                rows["state"].append(self.code("states", state))
+                for field in FIELDS:
+                    rows[field].append(_price(record.get(RECORD_KEYS[field])))
+        fresh = {name: np.asarray(values, dtype=DTYPES[name]) for name, values in rows.items()}
+
+        month = _month(day_no)
+        if month in self.months():
+            existing = self.read_month(month, mmap_mode=None)
+            replaced = np.isin(existing["source"], fresh["source"]) & (existing["day"] == day_no)
+            fresh = {name: np.concatenate([existing[name][~replaced], fresh[name]]) for name in DTYPES}
+        order = np.lexsort((fresh["state"], fresh["source"], fresh["day"]))
+        self._write_vocab()
+        self._write_month(month, {name: values[order] for name, values in fresh.items()})
+        return len(rows["day"])
+
+    def backfill(self, history, outputs):
+        # Seed the archive from the history partitions the first time it is
+        # built. A partition is only written when an output changed, so each
+        # source's last partition is carried forward over the days it has none
+        by_day = {}
+        for source, filename in outputs.items():
+            for day, path in history.partitions(filename).items():
+                with open(path, encoding="utf-8") as f:
+                    by_day.setdefault(day, {})[source] = json.load(f)
+        current = {}
+        for day in sorted(by_day):
+            current.update(by_day[day])
+            self.ingest(day, current)
+        return len(by_day)
+
+
+class PriceHistory:
+    # Read side of PriceColumns. Months are memory-mapped and only the ones
+    # overlapping the requested range are touched; filters are numpy masks
+    def __init__(self, root):
+        self.store = PriceColumns(root)
+        self.sources = list(self.store.vocab["sources"])
+        self.states = list(self.store.vocab["states"])
+
+    def _codes(self, names, vocab):
+        if names is None:
+            return None
+        if isinstance(names, str):
+            names = [names]
+        index = {name: i for i, name in enumerate(vocab)}
+        return np.array([index[name] for name in names if name in index], dtype=np.int16)
+
+    def select(self, start=None, end=None, sources=None, states=None):
+        # Columns for start <= day <= end (inclusive, dates or ISO strings)
+        lo = day_number(start) if start is not None else None
+        hi = day_number(end) if end is not None else None
+        source_codes = self._codes(sources, self.sources)
+        state_codes = self._codes(states, self.states)
+        chunks = []
+        for month in self.store.months():
+            if lo is not None and month < _month(lo):
+                continue
+            if hi is not None and month > _month(hi):
+                continue
+            columns = self.store.read_month(month)
+            days = columns["day"]
+            # Rows are sorted by day, so the range is two binary searches
+            first = np.searchsorted(days, lo, "left") if lo is not None else 0
+            last = np.searchsorted(days, hi, "right") if hi is not None else len(days)
+            chunk = {name: values[first:last] for name, values in columns.items()}
+            mask = None
+            if source_codes is not None:
+                mask = np.isin(chunk["source"], source_codes)
+            if state_codes is not None:
+                state_mask = np.isin(chunk["state"], state_codes)
+                mask = state_mask if mask is None else mask & state_mask
+            if mask is not None:
+                chunk = {name: values[mask] for name, values in chunk.items()}
+            chunks.append(chunk)
+        if not chunks:
+            return {name: np.empty(0, dtype=dtype) for name, dtype in DTYPES.items()}
+        if len(chunks) == 1:
+            return chunks[0]
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in DTYPES}
+
+    def frame(self, start=None, end=None, sources=None, states=None):
+        columns = self.select(start, end, sources, states)
+        return pd.DataFrame({
+            "date": (np.asarray(columns["day"], dtype="int64")).astype("datetime64[D]"),
+            "source": pd.Categorical.from_codes(np.asarray(columns["source"]), self.sources),
+            "state": pd.Categorical.from_codes(np.asarray(columns["state"]), self.states),
+            **{field: np.asarray(columns[field]) for field in FIELDS},
+        })
+
+    def pivot(self, field="current", by="state", start=None, end=None, sources=None, states=None):
+        # date x <by> table of `field`, averaged over whatever is not in the
+        # index (sources when by="state", states when by="source")
+        frame = self.frame(start, end, sources, states)
+        return frame.pivot_table(index="date", columns=by, values=field, aggfunc="mean", observed=True)
+
+    def rolling_mean(self, field="current", window=7, by="state", start=None, end=None, sources=None, states=None):
+        # Rolling over calendar days, so days without a run do not stretch the window
+        table = self.pivot(field, by, start, end, sources, states)
+        return table.rolling(f"{window}D", min_periods=1).mean()
+
+    def compare_sources(self, field="current", state=None, start=None, end=None, sources=None):
+        return self.pivot(field, "source", start, end, sources, state)
+
+    def compare_states(self, field="current", day=None, sources=None, states=None):
+        # One row per state for a single day (the latest one by default)
+        if day is None:
+            days = self.select(sources=sources, states=states)["day"]
+            if not len(days):
+                return pd.DataFrame()
+            day = EPOCH + datetime.timedelta(days=int(days.max()))
+        frame = self.frame(day, day, sources, states)
+        return frame.pivot_table(index="state", columns="source", values=field, aggfunc="mean", observed=True)
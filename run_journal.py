@@ -0,0 +1,106 @@
+import json
+import os
+import threading
+import time
+from collections import Counter
+
+# Only scrape_all opens a journal (open_journal); a scraper run on its own,
+# a benchmark or a recording always fetches everything
+ENABLED = os.getenv("SCRAPER_JOURNAL", "1") != "0"
+JOURNAL_DIR = os.getenv("SCRAPER_JOURNAL_DIR", os.path.join(".cache", "journal"))
+# Runs started within the same window share a journal unless SCRAPER_RUN_ID
+# names one (CI passes its run ID, which re-run attempts keep)
+RUN_WINDOW_HOURS = float(os.getenv("SCRAPER_RUN_WINDOW_HOURS", "12"))
+
+
+def default_run_id(now=None, window_hours=RUN_WINDOW_HOURS):
+    # Start of the current window in UTC, e.g. 2026-10-17T12
+    window = max(window_hours, 1 / 60) * 3600
+    start = (now or time.time()) // window * window
+    return time.strftime("%Y-%m-%dT%H%M", time.gmtime(start))
+
+
+class RunJournal:
+    # Append-only <run_id>.jsonl, one line per completed unit of work:
+    # {"source", "unit", "items"}. A unit is whatever a source can redo on its
+    # own: one state page of commodityonline / commoditymarketlive, one
+    # commodity's grid or table of agmarknet / mandiprices. Each line is
+    # fsynced before the unit counts as done, and a line torn by a crash is
+    # ignored on the next load
+    def __init__(self, root=JOURNAL_DIR, run_id=None):
+        self.root = root
+        self.run_id = run_id or os.getenv("SCRAPER_RUN_ID") or default_run_id()
+        self.path = os.path.join(root, f"{self.run_id}.jsonl")
+        self.units = {}
+        self.stats = Counter()
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    self.units[entry["source"], entry["unit"]] = entry["items"]
+        except OSError:
+            pass
+        self.stats["loaded"] = len(self.units)
+
+    def get(self, source, unit):
+        # Items of a unit finished earlier in this run, or None
+        items = self.units.get((source, unit))
+        if items is not None:
+            with self._lock:
+                self.stats["resumed"] += 1
+        return items
+
+    def record(self, source, unit, items):
+        line = json.dumps({"source": source, "unit": unit, "items": items}, ensure_ascii=False, separators=(",", ":"))
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+            self.units[source, unit] = items
+            self.stats["recorded"] += 1
+
+    def prune(self):
+        # Journals of earlier runs can no longer be resumed
+        for name in os.listdir(self.root):
+            if name.endswith(".jsonl") and name != os.path.basename(self.path):
+                os.remove(os.path.join(self.root, name))
+
+    def close(self):
+        # A run that published everything has nothing left to resume
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+            self.units.clear()
+
+    def summary(self):
+        with self._lock:
+            return {"run_id": self.run_id, **self.stats}
+
+
+_journal = None
+_journal_lock = threading.Lock()
+
+
+def open_journal():
+    # Turns journaling on for this process; None when disabled
+    global _journal
+    if not ENABLED:
+        return None
+    with _journal_lock:
+        if _journal is None:
+            _journal = RunJournal()
+        return _journal
+
+
+def get_journal():
+    # The journal scrape_all opened, or None: the scrapers only resume or
+    # record units inside a scrape_all run
+    return _journal
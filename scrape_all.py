@@ -1,172 +1,501 @@
 import sys
-import io
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
 
 # Optional: override default open to use utf-8 globally
 import builtins
 open = lambda *args, **kwargs: builtins.open(*args, **{'encoding': 'utf-8'} | kwargs)
 
+import argparse
 import asyncio
 import json
 import os
 import threading
-from collections import defaultdict
+import time
 import datetime
-
-from scrape_commoditymarketlive_com import scrape_all_states as scrape_all_states_commoditymarketlive
-from scrape_commodityonline_com import scrape_all_states as scrape_all_states_commodityonline
-from scrape_mandiprices_in import scrape_mandiprices
-from scrape_agmarknet_gov_in import scrape_all_states as scrape_all_states_agmarknet
-
-results = {
-    "commoditymarketlive": None,
-    "commodityonline": None,
-    "mandiprices": None,
-    "agmarknet": None
+import functools
+import glob
+import subprocess
+
+import browser_session
+import commodities as commodity_registry
+import delta_publish
+import history_store
+import http_cache
+import run_journal
+import sharding
+import source_guard
+import sources as source_registry
+import tracing
+from browser_session import RssSampler, SharedBrowser
+
+# The scraper modules (and Playwright, pandas and the district index behind
+# them) are imported only for the sources a run picks; see sources.py
+
+# Where the published JSON goes; benchmarks point this at a scratch directory
+DOCS_DIR = os.getenv("SCRAPER_DOCS_DIR", "docs")
+# Stage timings and counters (metrics.prom, trace.json); kept out of DOCS_DIR,
+# which is committed
+TRACE_DIR = os.getenv("SCRAPER_TRACE_DIR", "trace")
+
+# Commodities fetched this run; --commodities overrides SCRAPER_COMMODITIES
+COMMODITIES = list(commodity_registry.SELECTED)
+
+# Sources run and states fetched this run; --sources / --states override
+# SCRAPER_SOURCES / SCRAPER_STATES (None: every state)
+SOURCES = list(source_registry.SELECTED)
+STATES = source_registry.STATES
+
+# Output file behind each source (for the default commodity; the others get a
+# _<commodity> suffix), also the sources of the columnar price history
+PRICE_SOURCES = {
+    **{key: source_registry.output(key) for key in source_registry.SOURCES},
+    "combined": "combined_averages.json",
 }
 
-def run_commoditymarketlive():
-    try:
-        print("Starting CommodityMarketLive scraper", flush=True)
-        results["commoditymarketlive"] = asyncio.run(scrape_all_states_commoditymarketlive())
-    except Exception as e:
-        print(f"Error in CommodityMarketLive scraper: {e}", flush=True)
-
-def run_commodityonline():
-    try:
-        print("Starting CommodityOnline scraper", flush=True)
-        results["commodityonline"] = asyncio.run(scrape_all_states_commodityonline())
-    except Exception as e:
-        print(f"Error in CommodityOnline scraper: {e}", flush=True)
-
-def run_mandiprices():
+# (index, count) when this process is one shard of a sharded run (--shard)
+SHARD = None
+
+# {commodity: per-state results} per source run, filled in by publish() as
+# each commodity completes, so a source cut off midway keeps what it finished
+results = {key: {} for key in SOURCES}
+
+# Set up by main(); publish() writes nothing once the run is over, and only
+# collects in a shard (the merge step publishes)
+history = None
+publisher = None
+publishing = False
+publish_lock = threading.Lock()
+
+# How a source that did not finish cleanly shows up in status_report.json
+STATUS_LABELS = {"timeout": "Timed out", "skipped": "Skipped", "failed": "Failed", "partial": "Partial"}
+
+def source_states(key):
+    # A sharded source's states in this run, before they are dealt out
+    return [state for state in source_registry.module(key).states if not STATES or state in STATES]
+
+def shard_states(key):
+    # This shard's share of a sharded source's states
+    return sharding.deal(source_states(key), *SHARD)
+
+def shard_sources():
+    # The sources this process runs: all of them, or in a shard every sharded
+    # source plus its deal of the whole-table ones
+    if not SHARD:
+        return list(SOURCES)
+    whole = sharding.deal([key for key in SOURCES if not source_registry.sharded(key)], *SHARD)
+    return [key for key in SOURCES if source_registry.sharded(key) or key in whole]
+
+def source_scraper(key):
+    # (browser, on_commodity) -> the source's scrape coroutine. The module is
+    # imported on the first call, inside the guard, so a source that cannot
+    # even be imported fails on its own
+    def scrape(browser, on_commodity):
+        entry = source_registry.load(key)
+        if SHARD and source_registry.sharded(key):
+            # Outliers are judged across every state, so the states stay unfinished until the merge
+            return entry(COMMODITIES, browser=browser, on_commodity=on_commodity,
+                         only_states=shard_states(key), finish=lambda commodity, items: items)
+        if source_registry.sharded(key):
+            return entry(COMMODITIES, browser=browser, on_commodity=on_commodity, only_states=STATES,
+                         finish=functools.partial(source_finish, key))
+        return entry(COMMODITIES, browser=browser, on_commodity=on_commodity, only_states=STATES)
+    return scrape
+
+def source_finish(key, commodity, items, lost=()):
+    # A sharded source's finish_commodity for the run's states. Outliers are
+    # judged across every state, so a run narrowed with --states, or a merge
+    # that lost some shard's states, leaves them to widen(), once the other
+    # states are back
+    return source_registry.module(key).finish_commodity(commodity, items, only_states=STATES, flag=not (STATES or lost))
+
+def selected_sources():
+    return [(key, source_registry.label(key), source_scraper(key)) for key in results]
+
+def last_published(name):
+    # What an output last published; an output still kept only as a view
+    # (history from before the store) is imported first
+    history.import_view(name, os.path.join(DOCS_DIR, name))
+    return history.latest(name)
+
+def widen(key, commodity, data, lost=()):
+    # A run narrowed with --states fetched only some states, and a merge can
+    # lack the `lost` states of a failed or missing shard: every other state,
+    # and every lost one, keeps what the output last published, so today's
+    # partition, the view and the combined averages still cover them all
+    if not (STATES or lost) or not data:
+        return data
+    previous = last_published(commodity_registry.output_name(PRICE_SOURCES[key], commodity)) or []
+    kept = {record.get("State") for record in previous if record.get("State") in lost}
+    fresh = {record["State"]: record for record in data if record.get("State") and record["State"] not in kept}
+    merged = [fresh.pop(record.get("State"), record) for record in previous]
+    merged += [record for record in data if record.get("State") in fresh]
+    if source_registry.sharded(key):
+        # Judged across the merged states, not just the few fetched
+        import aggregation
+
+        merged = aggregation.flag_outliers(merged)
+    return merged
+
+def save_output(key, commodity, data):
+    # Skipped when the data is what this output already published
+    with tracing.span("publish"):
+        publisher.save(history, commodity_registry.output_name(PRICE_SOURCES[key], commodity), data)
+
+def publish(key, commodity, data):
+    # Called by a source the moment one commodity is complete: its output goes
+    # to disk now instead of after every source has finished
+    with publish_lock:
+        if not publishing:
+            return
+        results[key][commodity] = data
+        if history is None:
+            return
+        try:
+            results[key][commodity] = data = widen(key, commodity, data)
+            save_output(key, commodity, data)
+        except Exception as e:
+            print(f"Error saving {key} {commodity} results: {e}", flush=True)
+
+def run_source_thread(guard, key, label, scrape):
+    # Own event loop and browser; the guard cancels the scrape inside this loop
     try:
-        print("Starting MandiPrices scraper", flush=True)
-        results["mandiprices"] = asyncio.run(scrape_mandiprices(return_results=True))
+        asyncio.run(guard.run(key, label, lambda: scrape(None, functools.partial(publish, key))))
     except Exception as e:
-        print(f"Error in MandiPrices scraper: {e}", flush=True)
-
-def run_agmarknet():
+        print(f"Error in {label} scraper: {e}", flush=True)
+
+def run_threads(guard):
+    threads = {
+        key: threading.Thread(target=run_source_thread, args=(guard, key, label, scrape), daemon=True)
+        for key, label, scrape in selected_sources()
+    }
+    for thread in threads.values():
+        thread.start()
+
+    # A thread stuck outside the event loop (a blocking call) cannot be
+    # cancelled; past the run deadline it is left behind and not waited for
+    for thread in threads.values():
+        thread.join(guard.remaining())
+    guard.abandon([key for key, thread in threads.items() if thread.is_alive()])
+
+async def run_source_shared(guard, key, label, scrape, browser):
+    await guard.run(key, label, lambda: scrape(browser, functools.partial(publish, key)))
+
+async def run_shared(guard):
+    # Every source runs as a coroutine on this loop, each in its own context of
+    # one Chromium; it is launched only once a source falls back to a browser
+    browser = SharedBrowser(headless=True)
     try:
-        print("Starting Agmarknet scraper", flush=True)
-        results["agmarknet"] = asyncio.run(scrape_all_states_agmarknet())
-    except Exception as e:
-        print(f"Error in Agmarknet scraper: {e}", flush=True)
-
-def calculate_average(values):
-    valid = [v for v in values if isinstance(v, (int, float)) and v > 0]
-    if not valid:
-        return 0
-    return round(sum(valid) / len(valid), 2)
+        await asyncio.gather(*(
+            run_source_shared(guard, key, label, scrape, browser)
+            for key, label, scrape in selected_sources()
+        ))
+    finally:
+        await browser.close()
 
 def compute_per_state_averages(*sources):
-    merged = defaultdict(list)
-    for source in sources:
-        for entry in source or []:
-            state = entry.get("State")
-            if state:
-                merged[state].append(entry)
-
-    output = []
-    for state, entries in merged.items():
-        avg_entry = {"State": state}
-        for key in ["Current_Price", "Minimum_Price", "Maximum_Price"]:
-            values = [e.get(key, 0) for e in entries if isinstance(e.get(key), (int, float))]
-            avg_entry[key] = calculate_average(values)
-        output.append(avg_entry)
-
-    return sorted(output, key=lambda x: x["State"])
-
-def main():
-    print("Launching all scrapers...", flush=True)
-
-    t1 = threading.Thread(target=run_commoditymarketlive)
-    t2 = threading.Thread(target=run_commodityonline)
-    t3 = threading.Thread(target=run_mandiprices)
-    t4 = threading.Thread(target=run_agmarknet)
-
-    t1.start()
-    t2.start()
-    t3.start()
-    t4.start()
-
-    t1.join()
-    t2.join()
-    t3.join()
-    t4.join()
-
-    print("Saving JSON to /docs", flush=True)
-    os.makedirs("docs", exist_ok=True)
-
-    def save_with_date(filename, new_data):
-        today = datetime.date.today()
-        today_str = today.isoformat()
-        path = os.path.join("docs", filename)
-
-        if os.path.exists(path):
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    existing = json.load(f)
-            except Exception:
-                existing = {}
+    rows = [entry for source in sources for entry in source or [] if entry.get("State")]
+    if not rows:
+        return []
+    import aggregation  # pandas, only once there is something to average
+
+    # Each source already dropped its own outliers, and a handful of values per
+    # state is too few to estimate a spread from
+    table = aggregation.aggregate(rows, reject=False)
+    return aggregation.to_records(table, digits=2)
+
+def open_history():
+    global history, publisher
+    os.makedirs(DOCS_DIR, exist_ok=True)
+    history = history_store.HistoryStore(history_store.HISTORY_DIR or os.path.join(DOCS_DIR, "history"))
+    publisher = delta_publish.DeltaPublisher(DOCS_DIR)
+
+def stable_status(report):
+    # What status_report.json says about the sources; run timings and cache
+    # counters alone are not worth a rewrite
+    return {key: value for key, value in (report or {}).items() if key != "run"}
+
+def describe_outcome(outcome):
+    # "Partial (shard-1-of-2 failed)" for a source some shards did not finish
+    label = STATUS_LABELS.get(outcome["status"], "Failed")
+    shards = [f"{shard} {status}" for shard, status in (outcome.get("shards") or {}).items() if status != "ok"]
+    return f"{label} ({', '.join(shards)})" if shards else label
+
+def trace_cache(cache):
+    # HTTP cache counters for metrics.prom; status_report.json only carries
+    # them when something failed, and stays null on a clean run
+    if cache and cache.stats:
+        for name, value in cache.summary().items():
+            if name != "hit_ratio":
+                tracing.count(f"http_cache_{name}", value)
+
+def run_sources(mode):
+    # Runs the sources of this process; ({source: {commodity: result} or
+    # None}, guard, journal) once every one of them finished or ran out of time
+    global publishing
+    publishing = True
+
+    # A restart of the same run picks up the units its journal already holds
+    journal = run_journal.open_journal()
+    if journal:
+        journal.prune()
+        print(f"📒 Run {journal.run_id}: {len(journal.units)} unit(s) already done", flush=True)
+
+    guard = source_guard.RunGuard()
+    start = time.perf_counter()
+    with RssSampler() as rss:
+        if mode == "threads":
+            run_threads(guard)
         else:
-            existing = {}
-
-        if not isinstance(existing, dict):
-            existing = {}
-
-        # Keep only valid ISO date keys within last 30 days
-        cleaned = {}
-        for k, v in existing.items():
             try:
-                dt = datetime.date.fromisoformat(k)
-                if (today - dt).days <= 30:
-                    cleaned[k] = v
-            except ValueError:
-                continue  # skip invalid date
-
-        cleaned[today_str] = new_data
-
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(cleaned, f, indent=2)
-
-    if results["commoditymarketlive"]:
-        save_with_date("result_commoditymarketlive_in.json", results["commoditymarketlive"])
-
-    if results["commodityonline"]:
-        save_with_date("result_commodityonline_in.json", results["commodityonline"])
-
-    if results["mandiprices"]:
-        save_with_date("result_mandiprices_in.json", results["mandiprices"])
-
-    if results["agmarknet"]:
-        save_with_date("result_agmarknet_gov_in.json", results["agmarknet"])
-
-    # Combine all for per-state average
-    per_state_avg = compute_per_state_averages(
-        results["commoditymarketlive"],
-        results["commodityonline"],
-        results["mandiprices"],
-        results["agmarknet"]
-    )
-    save_with_date("combined_averages.json", per_state_avg)
-
-    # Save run timestamp
-    timestamp_data = {"last_run": datetime.datetime.now(datetime.timezone.utc).isoformat()}
-    with open("docs/run_timestamp.json", "w") as f:
-        json.dump(timestamp_data, f, indent=2)
-
-    # Save failure report
+                asyncio.run(run_shared(guard))
+            except Exception as e:
+                print(f"Error in shared browser session: {e}", flush=True)
+    # Sources that never got to run
+    guard.abandon([key for key in results if key not in guard.outcomes], status="failed")
+    guard.breaker.save()
+
+    # Late threads must not change what is being published
+    with publish_lock:
+        publishing = False
+        finished = {key: dict(results[key]) or None for key in results}
+    for key, data in finished.items():
+        if data:
+            guard.mark_partial(key, [commodity for commodity in COMMODITIES if not data.get(commodity)])
+    launches = browser_session.launch_times
+    print(f"⏱️ {len(launches)} browser launch(es), {sum(launches):.2f}s total startup, "
+          f"{time.perf_counter() - start:.2f}s scraping, peak RSS {rss.peak_kb / 1024:.0f} MB", flush=True)
+    return finished, guard, journal
+
+def publish_run(finished, outcomes, run, cache_summary=None, journal=None):
+    # Everything after the sources' own outputs: combined averages, price
+    # history, run timestamp and status report
+    print("Saving combined JSON to /docs", flush=True)
+    per_state_avg = {}
+    for commodity in COMMODITIES:
+        # Each source's own output was written by publish() as it completed
+        published = {key: (finished[key] or {}).get(commodity) for key in finished}
+
+        # Combine all for per-state average; a source not run this time
+        # contributes what it last published
+        with tracing.span("combine"):
+            earlier = {
+                key: last_published(commodity_registry.output_name(source_registry.output(key), commodity))
+                for key in source_registry.SOURCES if key not in finished
+            }
+            per_state_avg[commodity] = compute_per_state_averages(*published.values(), *earlier.values())
+            publisher.save(history, commodity_registry.output_name(PRICE_SOURCES["combined"], commodity), per_state_avg[commodity])
+
+        # The archive gets what every output holds now, changed or not, so each
+        # day it has covers every source: the history partitions skip an
+        # unchanged output, the archive only misses days without a run
+        current = {**earlier, **published, "combined": per_state_avg[commodity]}
+        for key in finished:
+            if not current[key]:
+                current[key] = last_published(commodity_registry.output_name(PRICE_SOURCES[key], commodity))
+        current = {key: data for key, data in current.items() if data}
+        try:
+            import price_history
+
+            columns = price_history.PriceColumns(commodity_registry.output_name(price_history.COLUMNS_DIR, commodity))
+            with tracing.span("price_history"):
+                if columns.exists():
+                    if current:
+                        columns.ingest(history.today, current)
+                else:
+                    columns.backfill(history, {
+                        key: commodity_registry.output_name(name, commodity) for key, name in PRICE_SOURCES.items()
+                    })
+        except Exception as e:
+            print(f"Error updating {commodity} price history: {e}", flush=True)
+
+    # Save run timestamp and this run's delta, only when some output changed:
+    # a run that found nothing new leaves docs/ untouched
+    run_time = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    if publisher.changed:
+        with open(os.path.join(DOCS_DIR, "run_timestamp.json"), "w") as f:
+            json.dump({"last_run": run_time}, f, indent=2)
+        publisher.write_delta(run_time)
+
+    # Save failure report: every source that did not finish ok, and every
+    # commodity one did not publish
     failed = {}
-    for key in results:
-        if results[key] is None:
-            failed[f"{key}_scraper"] = "Failed"
-
-    with open("docs/status_report.json", "w") as f:
-        json.dump(failed if failed else None, f, indent=2)
-
+    for key in finished:
+        if finished[key] is None:
+            failed[f"{key}_scraper"] = STATUS_LABELS.get(outcomes[key]["status"], "Failed")
+            continue
+        if outcomes[key]["status"] != "ok":
+            failed[f"{key}_scraper"] = describe_outcome(outcomes[key])
+        for commodity in COMMODITIES:
+            if not finished[key].get(commodity):
+                failed[f"{key}_scraper_{commodity}"] = "Failed"
+    complete = not failed
+    if failed:
+        failed["run"] = run
+        if journal:
+            failed["run"]["journal"] = journal.summary()
+        if cache_summary:
+            failed["run"]["http_cache"] = cache_summary
+
+    publisher.write_json("status_report.json", failed if failed else None, stable=stable_status)
+
+    # Only a run with something missing is worth resuming
+    if journal and complete:
+        journal.close()
+
+    history.write_index()
+    for key, outcome in outcomes.items():
+        print(f"⏱️ {key}: {outcome['status']} in {outcome['seconds']:.1f}s", flush=True)
+    print(f"💾 {len(history.writes)} history file(s) written, {len(publisher.outputs)} output(s) changed, "
+          f"{len(publisher.unchanged)} unchanged and skipped", flush=True)
+
+    tracing.count("history_writes", len(history.writes))
+    tracing.count("unchanged_outputs", len(publisher.unchanged))
+    os.makedirs(TRACE_DIR, exist_ok=True)
+    for path in tracing.write(TRACE_DIR):
+        print(f"📈 {path}", flush=True)
     print("All done!", flush=True)
 
+def select(commodities=None, sources=None, states=None, shard=None):
+    global COMMODITIES, SOURCES, STATES, SHARD, results
+    COMMODITIES = commodities or COMMODITIES
+    SOURCES = sources or SOURCES
+    STATES = states or STATES
+    SHARD = shard
+    results = {key: {} for key in shard_sources()}
+
+def main(mode="shared", commodities=None, sources=None, states=None):
+    select(commodities, sources, states)
+    print(f"Launching {', '.join(SOURCES)} ({mode} mode) for {', '.join(COMMODITIES)}"
+          f"{' in ' + ', '.join(STATES) if STATES else ''}...", flush=True)
+    open_history()
+    finished, guard, journal = run_sources(mode)
+    cache = http_cache.get_cache()
+    trace_cache(cache)
+    publish_run(finished, guard.outcomes, guard.summary(),
+                cache.summary() if cache and cache.stats else None, journal)
+
+def run_shard(mode="shared", commodities=None, sources=None, states=None, shard=(0, 1), directory=None):
+    # One shard of a sharded run: scrape this shard's share and write it as a
+    # partial for merge_shards(); docs/ is left alone
+    global history
+    select(commodities, sources, states, shard)
+    directory = directory or sharding.SHARD_DIR
+    label = sharding.name(*shard)
+    print(f"Launching {label}: {', '.join(results)} ({mode} mode) for {', '.join(COMMODITIES)}", flush=True)
+    history = None
+    finished, guard, journal = run_sources(mode)
+
+    run = guard.summary()
+    if journal:
+        run["journal"] = journal.summary()
+    cache = http_cache.get_cache()
+    trace_cache(cache)
+    if cache and cache.stats:
+        run["http_cache"] = cache.summary()
+    partial = {
+        "shard": shard[0],
+        "count": shard[1],
+        "commodities": COMMODITIES,
+        "sources": SOURCES,
+        "states": STATES,
+        "sharded": [key for key in SOURCES if source_registry.sharded(key)],
+        "whole": [key for key in SOURCES if not source_registry.sharded(key)],
+        "results": {
+            key: {
+                "sharded": source_registry.sharded(key),
+                "states": shard_states(key) if source_registry.sharded(key) else STATES,
+                "outcome": guard.outcomes[key],
+                "data": finished[key] or {},
+            }
+            for key in finished
+        },
+        "run": run,
+    }
+    print(f"🧩 {sharding.write_partial(directory, partial)}", flush=True)
+
+    if journal and all(finished[key] and len(finished[key]) == len(COMMODITIES) for key in finished):
+        journal.close()
+    os.makedirs(os.path.join(directory, label), exist_ok=True)
+    for path in tracing.write(os.path.join(directory, label)):
+        print(f"📈 {path}", flush=True)
+
+def merge_shards(directory=None):
+    # Publishes the partials of every shard exactly as main() would have
+    # published one process's results
+    global COMMODITIES, SOURCES, STATES
+    directory = directory or sharding.SHARD_DIR
+    partials = sharding.load_partials(directory)
+    COMMODITIES, SOURCES, STATES = partials[0]["commodities"], partials[0]["sources"], partials[0]["states"]
+    print(f"Merging {len(partials)} of {partials[0]['count']} shard(s) from {directory}", flush=True)
+
+    with tracing.span("merge"):
+        finished, outcomes, shards, lost = sharding.merge(partials, source_finish, source_states)
+    open_history()
+    for key, data in finished.items():
+        for commodity, result in (data or {}).items():
+            data[commodity] = widen(key, commodity, result, lost.get(key, {}).get(commodity, ()))
+            save_output(key, commodity, data[commodity])
+    caches = {label: run["http_cache"] for label, run in shards.items() if run.get("http_cache")}
+    publish_run(finished, outcomes, {"sources": outcomes, "shards": shards}, caches or None)
+
+def run_sharded(count, mode="shared", commodities=None, sources=None, states=None, directory=None):
+    # `count` worker processes of this script, one shard each, then the merge.
+    # Each shard keeps its own journal so a restart resumes only its states
+    select(commodities, sources, states)
+    directory = directory or sharding.SHARD_DIR
+    for path in glob.glob(os.path.join(directory, "shard-*-of-*.json")):
+        os.remove(path)
+    workers = []
+    for index in range(count):
+        env = {
+            **os.environ,
+            "SCRAPER_SHARD_DIR": directory,
+            "SCRAPER_JOURNAL_DIR": os.path.join(run_journal.JOURNAL_DIR, sharding.name(index, count)),
+        }
+        workers.append(subprocess.Popen([
+            sys.executable, os.path.abspath(__file__), "--mode", mode, "--shard", f"{index}/{count}",
+            "--commodities", ",".join(COMMODITIES), "--sources", ",".join(SOURCES), "--states", ",".join(STATES or []),
+        ], env=env))
+    for worker in workers:
+        worker.wait()
+    merge_shards(directory)
+
 if __name__ == "__main__":
-    main()
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mode", choices=["shared", "threads"], default="shared",
+                        help="shared: one event loop and one browser; threads: one thread, loop and browser per source")
+    parser.add_argument("--commodities", default=",".join(COMMODITIES),
+                        help=f"comma-separated list out of {', '.join(commodity_registry.COMMODITIES)}; "
+                             "each source fetches all of them in one session")
+    parser.add_argument("--sources", default=",".join(SOURCES),
+                        help=f"comma-separated list out of {', '.join(source_registry.SOURCES)}; "
+                             "only these scrapers are imported and run")
+    parser.add_argument("--states", default=",".join(STATES or []),
+                        help="comma-separated state slugs (e.g. punjab,uttar-pradesh) to fetch and publish; default all")
+    sharded = parser.add_mutually_exclusive_group()
+    sharded.add_argument("--shards", type=int, metavar="K",
+                         help="split the per-state sources across K worker processes, then merge into docs/")
+    sharded.add_argument("--shard", metavar="I/K",
+                         help=f"run only shard I of K (0-based, e.g. a CI matrix job) and write its partial to {sharding.SHARD_DIR}")
+    sharded.add_argument("--merge", nargs="?", const=sharding.SHARD_DIR, metavar="DIR",
+                         help="publish the partials every shard wrote to DIR; nothing is scraped")
+    args = parser.parse_args()
+    try:
+        selection = (
+            commodity_registry.parse_list(args.commodities),
+            source_registry.parse_list(args.sources),
+            source_registry.check_states(source_registry.parse_states(args.states)),
+        )
+        shard = sharding.parse(args.shard) if args.shard else None
+    except ValueError as e:
+        parser.error(str(e))
+    if args.merge:
+        merge_shards(args.merge)
+    elif shard:
+        run_shard(args.mode, *selection, shard=shard)
+    elif args.shards and args.shards > 1:
+        run_sharded(args.shards, args.mode, *selection)
+    else:
+        main(args.mode, *selection)
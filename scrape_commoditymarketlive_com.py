@@ -1,13 +1,18 @@
-import sys
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
-
 import asyncio
-from playwright.async_api import async_playwright
+import functools
+import os
 import re
-import nest_asyncio
+import sys
 
-nest_asyncio.apply()
+from browser_session import BrowserState, browser_context
+from network_policy import NetworkPolicy
+import http_fast_path
+import html_parsing
+import http_cache
+import commodities as commodity_registry
+import run_journal
+import streaming
+import tracing
 
 states = [
     "andhra-pradesh", "arunachal-pradesh", "assam", "bihar", "chattisgarh",
@@ -18,55 +23,205 @@ states = [
     "uttar-pradesh", "uttrakhand", "west-bengal"
 ]
 
-async def scrape_state_price(page, state):
+BASE_URL = os.getenv("COMMODITYMARKETLIVE_BASE_URL", "https://www.commoditymarketlive.com")
+
+PRICE_RE = re.compile(r"₹\s*([\d,\.]+)")
+
+ROWS_SELECTOR = "table.pricesummarytable tbody tr"
+
+# Serializes the whole summary table to lists of cell texts in one round trip
+ROWS_JS = "rows => rows.map(row => Array.from(row.querySelectorAll('td'), td => td.innerText))"
+
+NETWORK_POLICY = NetworkPolicy("commoditymarketlive", allow_domains=["commoditymarketlive.com"])
+
+# Cookies (or the whole profile) kept between runs with SCRAPER_BROWSER_STATE
+SAVED_STATE = BrowserState("commoditymarketlive", "table.pricesummarytable", ROWS_SELECTOR, ROWS_JS)
+
+# Parse results cached with the state pages; a change to this parser (or the
+# helpers it uses) starts over instead of serving the old parses
+PARSE_NAMESPACE = http_cache.parser_namespace("commoditymarketlive", sys.modules[__name__], html_parsing, commodity_registry)
+
+def selected_states(only_states=None):
+    # `states` narrowed to only_states (None: all of them), in the usual order
+    return [state for state in states if not only_states or state in only_states]
+
+def state_url(state, commodity=commodity_registry.DEFAULT_COMMODITY):
     url_state = "nct-of-delhi" if state == "delhi" else state
-    url = f"https://www.commoditymarketlive.com/mandi-price-state/{url_state}/potato"
+    return f"{BASE_URL}/mandi-price-state/{url_state}/{commodity}"
+
+def empty_result(state):
+    return {
+        "State": state,
+        "Current_Price": None,
+        "Minimum_Price": None,
+        "Maximum_Price": None
+    }
+
+def parse_summary_rows(state, rows):
+    prices = {}
+    for cols in rows:
+        if len(cols) < 2:
+            continue
+        label = cols[0].strip()
+        value = cols[1].strip()
+        match = PRICE_RE.search(value)
+        price_value = float(match.group(1).replace(',', '')) if match else None
+        prices[label] = price_value
+    return {
+        "State": state,
+        "Current_Price": prices.get("Average Market Price:"),
+        "Minimum_Price": prices.get("Minimum Market Price:"),
+        "Maximum_Price": prices.get("Maximum Market Price:")
+    }
+
+async def extract_rows(page):
+    return await page.eval_on_selector_all(ROWS_SELECTOR, ROWS_JS)
+
+async def extract_rows_per_cell(page):
+    # Old path: one IPC round trip per row and per cell, kept for benchmarking
+    rows = []
+    for row in await page.query_selector_all(ROWS_SELECTOR):
+        cols = await row.query_selector_all("td")
+        if len(cols) < 2:
+            continue
+        rows.append([await cols[0].inner_text(), await cols[1].inner_text()])
+    return rows
+
+async def scrape_state_price(page, state, bulk=True, commodity=commodity_registry.DEFAULT_COMMODITY):
     try:
-        await page.goto(url, timeout=20000)
-        await page.wait_for_selector("table.pricesummarytable", timeout=10000)
-        rows = await page.query_selector_all("table.pricesummarytable tbody tr")
-        prices = {}
-        for row in rows:
-            cols = await row.query_selector_all("td")
-            if len(cols) < 2:
-                continue
-            label = (await cols[0].inner_text()).strip()
-            value = (await cols[1].inner_text()).strip()
-            match = re.search(r"₹\s*([\d,\.]+)", value)
-            price_value = float(match.group(1).replace(',', '')) if match else None
-            if price_value is not None and price_value > 5500:
-                price_value = 0
-            prices[label] = price_value
-        return {
-            "State": state,
-            "Current_Price": prices.get("Average Market Price:"),
-            "Minimum_Price": prices.get("Minimum Market Price:"),
-            "Maximum_Price": prices.get("Maximum Market Price:")
-        }
+        with tracing.span("page.goto"):
+            await page.goto(state_url(state, commodity), timeout=20000)
+        with tracing.span("page.wait"):
+            await page.wait_for_selector("table.pricesummarytable", timeout=10000)
+        with tracing.span("page.extract"):
+            rows = await (extract_rows(page) if bulk else extract_rows_per_cell(page))
+        return parse_summary_rows(state, rows)
     except:
-        return {
-            "State": state,
-            "Current_Price": None,
-            "Minimum_Price": None,
-            "Maximum_Price": None
-        }
-
-async def scrape_all_states(progress_callback=None):
-    results = []
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-        for state in states:
+        tracing.count("page_failures")
+        return empty_result(state)
+
+def parse_state_page(state, html):
+    # Full state page as fetched by the HTTP fast path
+    if not html:
+        return empty_result(state)
+    rows = html_parsing.table_rows(html, ROWS_SELECTOR)
+    try:
+        return parse_summary_rows(state, rows)
+    except ValueError:
+        return empty_result(state)
+
+def has_prices(result):
+    return any(result[key] is not None for key in ("Current_Price", "Minimum_Price", "Maximum_Price"))
+
+def print_prices(result):
+    # Modified line below (changed ₹ to numeric-only)
+    print(f"   {result['Current_Price'] or 0} / {result['Minimum_Price'] or 0} / {result['Maximum_Price'] or 0}", flush=True)
+
+async def stream_commodities(commodities=None, progress_callback=None, browser=None, fast_path=None, only_states=None):
+    # (commodity, result) per state as they come in, fast path first and one
+    # Playwright page for whatever it could not read; (commodity, DONE) once
+    # all of a commodity's states are in
+    commodities = commodities or commodity_registry.SELECTED
+    wanted = selected_states(only_states)
+    pending = [(commodity, state) for commodity in commodities for state in wanted]
+    left = {commodity: len(wanted) for commodity in commodities}
+    got = set()
+
+    journal = run_journal.get_journal()
+
+    def count(commodity, result, resumed=False):
+        got.add((commodity, result["State"]))
+        tracing.count("states", resumed=resumed)
+        if journal and not resumed and has_prices(result):
+            journal.record("commoditymarketlive", f"{commodity}/{result['State']}", result)
+        left[commodity] -= 1
+        return not left[commodity]
+
+    # States an earlier attempt of this run already got come from the journal
+    if journal:
+        for commodity, state in pending:
+            result = journal.get("commoditymarketlive", f"{commodity}/{state}")
+            if result is not None:
+                yield commodity, result
+                if count(commodity, result, resumed=True):
+                    yield commodity, streaming.DONE
+        pending = [key for key in pending if key not in got]
+
+    if fast_path is None:
+        fast_path = http_fast_path.enabled()
+    if fast_path and pending:
+        cache = http_cache.get_cache()
+        urls = [state_url(state, commodity) for commodity, state in pending]
+        async for index, html in http_fast_path.iter_fetch(urls, cache=cache):
+            (commodity, state), url = pending[index], urls[index]
+            # An unchanged page since the last run reuses that run's parse
+            result = cache.cached_parse(url, html, PARSE_NAMESPACE) if cache and html else None
+            if result is None:
+                result = await html_parsing.parse_off_loop(parse_state_page, state, html)
+                if cache and html:
+                    cache.remember_parse(url, html, PARSE_NAMESPACE, result)
+            if not has_prices(result):
+                continue  # left for the Playwright fallback
             if progress_callback:
                 progress_callback(state)
-            print(f"Scraping Live site : {state}", flush=True)
-            result = await scrape_state_price(page, state)
-            # Modified line below (changed ₹ to numeric-only)
-            print(f"   {result['Current_Price'] or 0} / {result['Minimum_Price'] or 0} / {result['Maximum_Price'] or 0}", flush=True)
-            results.append(result)
-        await browser.close()
-    return results
+            print(f"Scraping Live site : {state} [{commodity}] (http)", flush=True)
+            print_prices(result)
+            yield commodity, result
+            if count(commodity, result):
+                yield commodity, streaming.DONE
+        pending = [key for key in pending if key not in got]
+        if pending:
+            print(f"Falling back to Playwright for {len(pending)} Live site page(s)", flush=True)
+
+    if pending:
+        try:
+            # One page walks every remaining commodity and state
+            async with browser_context(browser, launch_options={"headless": True}, state=SAVED_STATE) as context:
+                await NETWORK_POLICY.install(context)
+                page = await context.new_page()
+                for commodity, state in pending:
+                    if progress_callback:
+                        progress_callback(state)
+                    print(f"Scraping Live site : {state} [{commodity}]", flush=True)
+                    result = await scrape_state_price(page, state, commodity=commodity)
+                    print_prices(result)
+                    yield commodity, result
+                    if count(commodity, result):
+                        yield commodity, streaming.DONE
+        except Exception as e:
+            if not got:
+                raise
+            # Keep what the fast path already got; the rest publish as missing
+            print(f"Playwright fallback failed for the Live site: {e}", flush=True)
+        NETWORK_POLICY.report()
+
+def finish_commodity(commodity, found, only_states=None, flag=True):
+    # Prices far off the other states' (wrong unit, typo) are published as 0;
+    # flag=False leaves that to a caller that still adds states (a --states run).
+    # pandas is only imported here, so a shard (which leaves this to the merge) never loads it
+    by_state = {result["State"]: result for result in found}
+    records = [by_state.get(state) or empty_result(state) for state in selected_states(only_states)]
+    if not flag:
+        return records
+    import aggregation
+
+    return aggregation.flag_outliers(records)
+
+async def scrape_commodities(commodities=None, progress_callback=None, browser=None, fast_path=None, on_commodity=None, only_states=None, finish=None):
+    # {commodity: [result per state]} for every commodity in one session;
+    # on_commodity(commodity, results) sees each one as soon as it is complete.
+    # A shard passes finish= to keep its states unfinished for the merge step
+    stream = stream_commodities(commodities, progress_callback, browser, fast_path, only_states)
+    return await streaming.collect(stream, finish or functools.partial(finish_commodity, only_states=only_states), on_commodity)
+
+async def scrape_all_states(progress_callback=None, browser=None, fast_path=None, commodity=None):
+    commodity = commodity or commodity_registry.DEFAULT_COMMODITY
+    results = await scrape_commodities([commodity], progress_callback, browser, fast_path)
+    return results[commodity]
 
 # To run the script
 if __name__ == "__main__":
+    import sys
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
     asyncio.run(scrape_all_states())
@@ -1,16 +1,17 @@
-import sys
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
-
-
-# ... your existing imports and logic ...
-
 import asyncio
-from playwright.async_api import async_playwright
-from bs4 import BeautifulSoup
-import nest_asyncio
+import functools
+import os
+import sys
 
-nest_asyncio.apply()
+from browser_session import BrowserState, browser_context
+from network_policy import NetworkPolicy
+import http_fast_path
+import html_parsing
+import http_cache
+import commodities as commodity_registry
+import run_journal
+import streaming
+import tracing
 
 states = [
     "andhra-pradesh", "arunachal-pradesh", "assam", "bihar", "chattisgarh",
@@ -21,6 +22,29 @@ states = [
     "uttar-pradesh", "uttrakhand", "west-bengal"
 ]
 
+BASE_URL = os.getenv("COMMODITYONLINE_BASE_URL", "https://www.commodityonline.com")
+
+# Number of pages fetching states at the same time (1 = old sequential behaviour)
+DEFAULT_CONCURRENCY = int(os.getenv("COMMODITYONLINE_CONCURRENCY", "4"))
+
+# Only the server-rendered highlight block is read, so page scripts are not needed
+NETWORK_POLICY = NetworkPolicy("commodityonline", allow_domains=["commodityonline.com"])
+
+# Cookies (or the whole profile) kept between runs with SCRAPER_BROWSER_STATE
+SAVED_STATE = BrowserState("commodityonline", "div.mandi_highlight", "div.row > div.col-md-4")
+
+# Parse results cached with the state pages; a change to this parser (or the
+# helpers it uses) starts over instead of serving the old parses
+PARSE_NAMESPACE = http_cache.parser_namespace("commodityonline", sys.modules[__name__], html_parsing, commodity_registry)
+
+def selected_states(only_states=None):
+    # `states` narrowed to only_states (None: all of them), in the usual order
+    return [state for state in states if not only_states or state in only_states]
+
+def state_url(state, commodity=commodity_registry.DEFAULT_COMMODITY):
+    url_state = "nct-of-delhi" if state == "delhi" else state
+    return f"{BASE_URL}/mandiprices/{commodity}/{url_state}"
+
 def parse_prices(html):
     if not html:
         return {
@@ -29,70 +53,194 @@ def parse_prices(html):
             'Maximum_Price': None
         }
 
-    soup = BeautifulSoup(html, "html.parser")
     result = {
         'Current_Price': None,
         'Minimum_Price': None,
         'Maximum_Price': None
     }
 
-    divs = soup.select('div.row > div.col-md-4')
-    for div in divs:
-        label = div.find('h4')
-        price_tag = div.find('p')
-        if label and price_tag:
-            text_label = label.get_text(strip=True)
-            price_text = price_tag.get_text(strip=True)
-            price_num = price_text.replace('₹', '').replace('/Quintal', '').replace('Rs', '').replace(',', '').strip()
-            try:
-                price_value = float(price_num)
-                if price_value > 5500:
-                    price_value = 0
-            except:
-                price_value = None
-
-            if "Average Price" in text_label:
-                result['Current_Price'] = price_value
-            elif "Lowest Market Price" in text_label:
-                result['Minimum_Price'] = price_value
-            elif "Costliest Market Price" in text_label:
-                result['Maximum_Price'] = price_value
+    for text_label, price_text in html_parsing.labelled_values(html, 'div.row > div.col-md-4', 'h4', 'p'):
+        price_num = price_text.replace('₹', '').replace('/Quintal', '').replace('Rs', '').replace(',', '').strip()
+        try:
+            price_value = float(price_num)
+        except:
+            price_value = None
+
+        if "Average Price" in text_label:
+            result['Current_Price'] = price_value
+        elif "Lowest Market Price" in text_label:
+            result['Minimum_Price'] = price_value
+        elif "Costliest Market Price" in text_label:
+            result['Maximum_Price'] = price_value
 
     return result
 
-async def scrape_all_states(progress_callback=None):
-    all_prices = []
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        context = await browser.new_context(user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36")
-        page = await context.new_page()
-
-        for state in states:
-            if progress_callback:
-                progress_callback(state)
-            print(f"Scraping Online site : {state}", flush=True)
-
-            html = None
-            try:
-                url_state = "nct-of-delhi" if state == "delhi" else state
-                url = f"https://www.commodityonline.com/mandiprices/potato/{url_state}"
-
-                await page.goto(url, timeout=10000)
-                await page.wait_for_selector("div.mandi_highlight", timeout=10000)
-                html = await page.inner_html("div.mandi_highlight")
-            except:
-                pass  # suppress error messages
-
-            prices = parse_prices(html)
-            prices["State"] = state
-            avg = prices['Current_Price']
-            min_ = prices['Minimum_Price']
-            max_ = prices['Maximum_Price']
-            # Modified line below
-            print(f"   {avg or 0} / {min_ or 0} / {max_ or 0}", flush=True)
-            all_prices.append(prices)
-
-        await browser.close()
-
-    return all_prices
+async def scrape_state(page, state, commodity=commodity_registry.DEFAULT_COMMODITY):
+    html = None
+    try:
+        with tracing.span("page.goto"):
+            await page.goto(state_url(state, commodity), timeout=10000)
+        with tracing.span("page.wait"):
+            await page.wait_for_selector("div.mandi_highlight", timeout=10000)
+        with tracing.span("page.extract"):
+            html = await page.inner_html("div.mandi_highlight")
+    except:
+        tracing.count("page_failures")  # suppress error messages
+
+    prices = await html_parsing.parse_off_loop(parse_prices, html)
+    prices["State"] = state
+    return prices
+
+def parse_state_page(html):
+    # Full state page as fetched by the HTTP fast path
+    return parse_prices(html_parsing.inner_html(html, "div.mandi_highlight") if html else None)
+
+def has_prices(prices):
+    return any(prices[key] is not None for key in ('Current_Price', 'Minimum_Price', 'Maximum_Price'))
+
+def print_prices(state, prices):
+    avg = prices['Current_Price']
+    min_ = prices['Minimum_Price']
+    max_ = prices['Maximum_Price']
+    print(f"   {state}: {avg or 0} / {min_ or 0} / {max_ or 0}", flush=True)
+
+async def stream_states_http(pending, progress_callback=None):
+    # (commodity, prices) for every page of pending [(commodity, state)] the
+    # fast path could read, as the responses arrive over one pooled client
+    cache = http_cache.get_cache()
+    urls = [state_url(state, commodity) for commodity, state in pending]
+    async for index, html in http_fast_path.iter_fetch(urls, cache=cache):
+        (commodity, state), url = pending[index], urls[index]
+        # An unchanged page since the last run reuses that run's parse
+        prices = cache.cached_parse(url, html, PARSE_NAMESPACE) if cache and html else None
+        if prices is None:
+            prices = await html_parsing.parse_off_loop(parse_state_page, html)
+            if cache and html:
+                cache.remember_parse(url, html, PARSE_NAMESPACE, prices)
+        if not has_prices(prices):
+            continue  # left for the Playwright fallback
+        prices["State"] = state
+        if progress_callback:
+            progress_callback(state)
+        print(f"Scraping Online site : {state} [{commodity}] (http)", flush=True)
+        print_prices(state, prices)
+        yield commodity, prices
+
+async def stream_states_browser(pending, progress_callback=None, concurrency=None, browser=None):
+    concurrency = max(1, min(concurrency or DEFAULT_CONCURRENCY, len(pending)))
+
+    queue = asyncio.Queue()
+    for commodity, state in pending:
+        queue.put_nowait((commodity, state))
+    # Workers stop fetching while this many results wait to be consumed
+    done = asyncio.Queue(concurrency)
+
+    async with browser_context(
+        browser,
+        launch_options={"headless": True},
+        state=SAVED_STATE,
+        user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+    ) as context:
+        await NETWORK_POLICY.install(context)
+
+        # Each worker owns one page and pulls the next (commodity, state) off the
+        # shared queue, so a slow state only holds up its own page and every
+        # commodity reuses the same warmed pages.
+        async def worker():
+            page = await context.new_page()
+            while True:
+                try:
+                    commodity, state = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                if progress_callback:
+                    progress_callback(state)
+                print(f"Scraping Online site : {state} [{commodity}]", flush=True)
+
+                prices = await scrape_state(page, state, commodity)
+                print_prices(state, prices)
+                await done.put((commodity, prices))
+            await page.close()
+
+        workers = asyncio.ensure_future(asyncio.gather(*(worker() for _ in range(concurrency))))
+        async for item in streaming.drain(done, workers):
+            yield item
+
+    NETWORK_POLICY.report()
+
+async def stream_commodities(commodities=None, progress_callback=None, concurrency=None, browser=None, fast_path=None, only_states=None):
+    # (commodity, prices) per state as they come in, fast path first and
+    # Playwright for whatever it could not read; (commodity, DONE) once all of
+    # a commodity's states are in
+    commodities = commodities or commodity_registry.SELECTED
+    wanted = selected_states(only_states)
+    pending = [(commodity, state) for commodity in commodities for state in wanted]
+    left = {commodity: len(wanted) for commodity in commodities}
+    got = set()
+
+    journal = run_journal.get_journal()
+
+    def count(commodity, prices, resumed=False):
+        got.add((commodity, prices["State"]))
+        tracing.count("states", resumed=resumed)
+        if journal and not resumed and has_prices(prices):
+            journal.record("commodityonline", f"{commodity}/{prices['State']}", prices)
+        left[commodity] -= 1
+        return not left[commodity]
+
+    # States an earlier attempt of this run already got come from the journal
+    if journal:
+        for commodity, state in pending:
+            prices = journal.get("commodityonline", f"{commodity}/{state}")
+            if prices is not None:
+                yield commodity, prices
+                if count(commodity, prices, resumed=True):
+                    yield commodity, streaming.DONE
+        pending = [key for key in pending if key not in got]
+
+    if fast_path is None:
+        fast_path = http_fast_path.enabled()
+    if fast_path and pending:
+        async for commodity, prices in stream_states_http(pending, progress_callback):
+            yield commodity, prices
+            if count(commodity, prices):
+                yield commodity, streaming.DONE
+        pending = [key for key in pending if key not in got]
+        if pending:
+            print(f"Falling back to Playwright for {len(pending)} Online site page(s)", flush=True)
+
+    if pending:
+        try:
+            async for commodity, prices in stream_states_browser(pending, progress_callback, concurrency, browser):
+                yield commodity, prices
+                if count(commodity, prices):
+                    yield commodity, streaming.DONE
+        except Exception as e:
+            if not got:
+                raise
+            # Keep what the fast path already got; the rest publish as missing
+            print(f"Playwright fallback failed for the Online site: {e}", flush=True)
+
+def finish_commodity(commodity, found, only_states=None, flag=True):
+    # Prices far off the other states' (wrong unit, typo) are published as 0;
+    # flag=False leaves that to a caller that still adds states (a --states run).
+    # pandas is only imported here, so a shard (which leaves this to the merge) never loads it
+    by_state = {prices["State"]: prices for prices in found}
+    records = [by_state.get(state) or {**parse_prices(None), "State": state} for state in selected_states(only_states)]
+    if not flag:
+        return records
+    import aggregation
+
+    return aggregation.flag_outliers(records)
+
+async def scrape_commodities(commodities=None, progress_callback=None, concurrency=None, browser=None, fast_path=None, on_commodity=None, only_states=None, finish=None):
+    # {commodity: [prices per state]} for every commodity in one session;
+    # on_commodity(commodity, prices) sees each one as soon as it is complete.
+    # A shard passes finish= to keep its states unfinished for the merge step
+    stream = stream_commodities(commodities, progress_callback, concurrency, browser, fast_path, only_states)
+    return await streaming.collect(stream, finish or functools.partial(finish_commodity, only_states=only_states), on_commodity)
+
+async def scrape_all_states(progress_callback=None, concurrency=None, browser=None, fast_path=None, commodity=None):
+    commodity = commodity or commodity_registry.DEFAULT_COMMODITY
+    results = await scrape_commodities([commodity], progress_callback, concurrency, browser, fast_path)
+    return results[commodity]
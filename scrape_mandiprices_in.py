@@ -1,26 +1,115 @@
-import sys
-sys.stdout.reconfigure(encoding='utf-8')
-sys.stderr.reconfigure(encoding='utf-8')
-
-
-# ... your existing imports and logic ...
-
-import asyncio, re, random
-from statistics import mean
-from collections import defaultdict
-from playwright.async_api import async_playwright
-import nest_asyncio
-
-nest_asyncio.apply()
-
-def parse_price(text):
-    match = re.search(r"[\d,.]+", text)
-    return float(match.group(0).replace(",", "")) if match else None
-
-async def wait_random(label=None):
-    delay = random.randint(5, 8)
-    print(f"Waiting {delay}s" + (f" after {label}" if label else ""))
-    await asyncio.sleep(delay)
+import asyncio, os, random, time
+
+from browser_session import BrowserState, browser_context
+from network_policy import NetworkPolicy
+import commodities as commodity_registry
+import run_journal
+import streaming
+import tracing
+
+# The SPA loads its data over XHR from hosts we don't control, so no third-party
+# script filtering here; stylesheets stay because the dropdown waits check visibility
+NETWORK_POLICY = NetworkPolicy("mandiprices", allow_types=["stylesheet"])
+
+BASE_URL = os.getenv("MANDIPRICES_BASE_URL", "https://www.mandiprices.in")
+
+# Jittered politeness floor between steps, in seconds; everything else waits on page signals
+POLITE_DELAY = (
+    float(os.getenv("MANDIPRICES_MIN_DELAY", "0.3")),
+    float(os.getenv("MANDIPRICES_MAX_DELAY", "1.0")),
+)
+
+# Upper bound for any single signal wait, in seconds
+SIGNAL_TIMEOUT = 10
+
+TABLE_ROWS = 'xpath=//table//tbody//tr'
+
+# Row count plus first row text: changes when a selection re-renders the table
+TABLE_FINGERPRINT_JS = """() => {
+    const rows = document.querySelectorAll('table tbody tr');
+    return rows.length + '|' + (rows.length ? rows[0].innerText : '');
+}"""
+
+ROW_CHUNK_SIZE = int(os.getenv("MANDIPRICES_ROW_CHUNK", "1000"))
+
+# Grid column holding the commodity name
+COMMODITY_CELL = 4
+
+# Rows [start, end) as compact [state, commodity, min, max, modal] tuples (null for short rows),
+# plus the total row count so the caller knows when to stop
+ROWS_CHUNK_JS = """([start, end, commodityCell]) => {
+    const rows = document.querySelectorAll('table tbody tr');
+    const out = [];
+    for (let i = start; i < Math.min(end, rows.length); i++) {
+        const cells = rows[i].querySelectorAll('td');
+        out.push(cells.length < 11 ? null : [1, commodityCell, 8, 9, 10].map(c => cells[c].innerText));
+    }
+    return {total: rows.length, rows: out};
+}"""
+
+# The SPA's bundles (profile mode) and its stored dropdown state, kept between
+# runs with SCRAPER_BROWSER_STATE
+SAVED_STATE = BrowserState("mandiprices", TABLE_ROWS, TABLE_FINGERPRINT_JS, ROWS_CHUNK_JS, 'xpath=//button[@role="combobox"]')
+
+step_latency = []
+
+def record_step(label, started):
+    elapsed = time.perf_counter() - started
+    step_latency.append((label, elapsed))
+    print(f"Step '{label}' took {elapsed:.2f}s")
+
+def report_step_latency():
+    total = sum(elapsed for _, elapsed in step_latency)
+    print(f"Per-step latency ({total:.2f}s total):")
+    for label, elapsed in step_latency:
+        print(f"   {elapsed:6.2f}s  {label}")
+
+async def polite_pause():
+    await tracing.sleep(random.uniform(*POLITE_DELAY))
+
+async def wait_network_idle(page, timeout=SIGNAL_TIMEOUT):
+    try:
+        with tracing.span("page.idle"):
+            await page.wait_for_load_state("networkidle", timeout=timeout * 1000)
+    except Exception:
+        pass  # long-polling sites never go idle; the other signals still apply
+
+async def wait_until_stable(probe, timeout=SIGNAL_TIMEOUT, interval=0.2, settle=2):
+    # Poll probe() until it returns the same truthy value `settle` times in a row
+    deadline = time.perf_counter() + timeout
+    last, same = None, 0
+    while time.perf_counter() < deadline:
+        value = await probe()
+        same = same + 1 if value and value == last else 0
+        if same >= settle:
+            return value
+        last = value
+        await asyncio.sleep(interval)
+    return last
+
+async def table_fingerprint(page):
+    try:
+        return await page.evaluate(TABLE_FINGERPRINT_JS)
+    except Exception:
+        return None
+
+async def wait_table_changed(page, before, timeout=SIGNAL_TIMEOUT):
+    # Wait for the table to re-render after a selection, then for it to stop changing
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if await table_fingerprint(page) != before:
+            break
+        await asyncio.sleep(0.2)
+    else:
+        return False
+    await wait_until_stable(lambda: table_fingerprint(page), timeout=max(deadline - time.perf_counter(), 1))
+    return True
+
+async def settle(page, label):
+    started = time.perf_counter()
+    await wait_network_idle(page)
+    await polite_pause()
+    record_step(label, started)
 
 async def retry(action, label="", attempts=2, wait=1000):
     for i in range(attempts):
@@ -28,12 +117,50 @@ async def retry(action, label="", attempts=2, wait=1000):
             return await action()
         except Exception as e:
             print(f"Retry {i+1}/{attempts} failed: {label} → {e}")
+            tracing.count("retries")
             await asyncio.sleep(wait / 1000)
     raise Exception(f"Failed after {attempts} attempts: {label}")
 
-async def select_by_label(page, label_text, desired_option):
+async def iter_table_rows(page, chunk_size=None):
+    # Streams (state, commodity, min, max, modal) cell texts, serialized in the page chunk by chunk;
+    # no ElementHandles are created, so nothing stays pinned in the browser
+    chunk_size = chunk_size or ROW_CHUNK_SIZE
+    start = 0
+    while True:
+        with tracing.span("page.extract"):
+            chunk = await page.evaluate(ROWS_CHUNK_JS, [start, start + chunk_size, COMMODITY_CELL])
+        for row in chunk["rows"]:
+            if row is not None:
+                yield tuple(row)
+        start += chunk_size
+        if start >= chunk["total"]:
+            break
+
+async def iter_table_rows_per_handle(page):
+    # Old path: one ElementHandle and one IPC round trip per row and per cell, kept for benchmarking
+    rows = await page.query_selector_all(TABLE_ROWS)
+    for idx, row in enumerate(rows):
+        try:
+            cols = await row.query_selector_all("xpath=.//td")
+            if len(cols) < 11:
+                continue
+            text = [await col.inner_text() for col in cols]
+        except Exception as e:
+            print(f"Error: Failed to extract row #{idx}: {e}")
+            continue
+        yield text[1], text[COMMODITY_CELL], text[8], text[9], text[10]
+
+async def select_by_label(page, label_text, desired_option, commodity="Potato"):
+    # Raises when the option can't be selected, or when a commodity selection
+    # leaves the previous commodity's table in place, so nothing reads a
+    # table for the wrong filters
+    with tracing.span("select", dropdown=label_text):
+        await _select_by_label(page, label_text, desired_option, commodity)
+
+async def _select_by_label(page, label_text, desired_option, commodity):
+    started = time.perf_counter()
     try:
-        await wait_random(f"{label_text} dropdown")
+        await polite_pause()
 
         buttons = page.locator('xpath=//button[@role="combobox"]')
         count = await buttons.count()
@@ -62,26 +189,20 @@ async def select_by_label(page, label_text, desired_option):
                         return
                 except:
                     continue
-            print(f"Skipping: Dropdown button with label containing '{label_text}' not found")
-            return
+            raise RuntimeError(f"Dropdown button with label containing '{label_text}' not found")
 
         print(f"Selecting '{desired_option}' from '{label_text}'")
+        before = await table_fingerprint(page)
         await target.click()
 
-        if label_text.lower() == "all commodities":
-            print("'All Commodities' dropdown opened, waiting 11s before selecting 'Potato'")
-            await asyncio.sleep(11)
-        elif label_text.lower() == "paginated":
-            print("'Paginated' dropdown opened, waiting 11s before selecting 'Scroll'")
-            await asyncio.sleep(11)
-        else:
-            await retry(
-                lambda: page.locator('xpath=//div[@data-radix-popper-content-wrapper]').wait_for(state="visible", timeout=10000),
-                f"wait for dropdown '{label_text}' content to appear"
-            )
-            delay = random.randint(5, 8)
-            print(f"'{label_text}' visible, waiting extra {delay}s before selecting '{desired_option}'...")
-            await asyncio.sleep(delay)
+        await retry(
+            lambda: page.locator('xpath=//div[@data-radix-popper-content-wrapper]').wait_for(state="visible", timeout=10000),
+            f"wait for dropdown '{label_text}' content to appear"
+        )
+        # Long lists (all commodities) render progressively; wait until the options stop growing
+        options = page.locator('xpath=//div[@role="option"]')
+        option_count = await wait_until_stable(options.count)
+        print(f"'{label_text}' open with {option_count} options, selecting '{desired_option}'")
 
         await retry(
             lambda: page.locator(f'xpath=//div[@role="option" and contains(.,"{desired_option}")]').first.wait_for(state="visible", timeout=8000),
@@ -91,120 +212,193 @@ async def select_by_label(page, label_text, desired_option):
         await retry(lambda: option.scroll_into_view_if_needed(), f"scroll '{desired_option}' into view")
         await retry(lambda: option.click(), f"click option '{desired_option}'")
 
-        await wait_random(f"after selecting '{desired_option}'")
+        changed = await wait_table_changed(page, before)
+        await wait_network_idle(page)
 
         confirmed = await target.text_content() or ""
         if desired_option.lower() not in confirmed.lower():
-            print(f"Warning: Confirmed selection is '{confirmed}', expected '{desired_option}'")
+            raise RuntimeError(f"Confirmed selection is '{confirmed}', expected '{desired_option}'")
+        if not changed:
+            if desired_option == commodity:
+                raise RuntimeError(f"Table did not change within {SIGNAL_TIMEOUT}s after selecting '{desired_option}'")
+            print(f"Table did not change within {SIGNAL_TIMEOUT}s after selecting '{desired_option}'")
 
-        # Re-check Potato if we just selected Scroll
+        # Re-check the commodity if we just selected Scroll (returns early while it is still selected)
         if label_text.lower() == "paginated":
-            print("Re-checking 'All Commodities' → 'Potato' after Scroll selection")
-            await select_by_label(page, "All Commodities", "Potato")
+            print(f"Re-checking 'All Commodities' → '{commodity}' after Scroll selection")
+            await select_by_label(page, "All Commodities", commodity, commodity=commodity)
 
     except Exception as e:
         print(f"Error: Dropdown failed [{label_text} → {desired_option}]: {e}")
-
-async def scrape_mandiprices(return_results=False):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)
-        page = await browser.new_page()
-
+        raise
+    finally:
+        record_step(f"{label_text} → {desired_option}", started)
+
+def summarize(rows, only_states=None):
+    # (state, min, max, modal) cell texts -> one record per state in `states`
+    # (or just those of only_states)
+    # Modal price is what the site calls the current price. pandas is only
+    # imported once there are rows to summarize
+    import aggregation
+
+    fields = ("Minimum_Price", "Maximum_Price", "Current_Price")
+    frame = aggregation.text_frame(rows, ["State", *fields], fields)
+    averaged_data = aggregation.to_records(aggregation.aggregate(frame, fields=fields), digits=0)
+
+    states = [
+        "andhra-pradesh", "arunachal-pradesh", "assam", "bihar", "chattisgarh",
+        "delhi", "gujarat", "haryana", "himachal-pradesh", "jharkhand",
+        "karnataka", "kerala", "madhya-pradesh", "maharashtra", "manipur",
+        "meghalaya", "mizoram", "nagaland", "odisha", "punjab",
+        "rajasthan", "sikkim", "tamil-nadu", "telangana", "tripura",
+        "uttar-pradesh", "uttrakhand", "west-bengal"
+    ]
+
+    mapping = {"nct-of-delhi": "delhi", "uttarakhand": "uttrakhand"}
+    normalized = {}
+
+    for item in averaged_data:
+        raw = item["State"].strip().lower().replace(" ", "-")
+        name = mapping.get(raw, raw)
+        normalized[name] = {
+            "State": name,
+            "Minimum_Price": item["Minimum_Price"],
+            "Maximum_Price": item["Maximum_Price"],
+            "Current_Price": item["Current_Price"]
+        }
+
+    final = []
+    for state in sorted(states):
+        if only_states and state not in only_states:
+            continue
+        final.append(normalized.get(state, {
+            "State": state,
+            "Minimum_Price": 0,
+            "Maximum_Price": 0,
+            "Current_Price": 0
+        }))
+    return final
+
+async def iter_table(page, commodity):
+    # Streams the rendered table as (commodity, (state, min, max, modal)); a
+    # row naming another known commodity goes to that one, so a mixed table
+    # serves several at once. Rows naming a commodity the registry doesn't
+    # know are dropped rather than credited to `commodity`
+    started = time.perf_counter()
+    with tracing.span("page.wait"):
+        await retry(lambda: page.locator(TABLE_ROWS).first.wait_for(state="visible", timeout=10000), "wait for table to appear")
+        # Scroll mode keeps appending rows for a while; wait for the count to level off
+        await wait_until_stable(page.locator(TABLE_ROWS).count, timeout=30, interval=0.5)
+    record_step(f"{commodity} table rows loaded", started)
+
+    started = time.perf_counter()
+    count = 0
+    unknown = {}
+    async for state, commodity_text, min_text, max_text, modal_text in iter_table_rows(page):
+        found = commodity_registry.from_label(commodity_text)
+        if found is None:
+            unknown[commodity_text.strip()] = unknown.get(commodity_text.strip(), 0) + 1
+            continue
+        yield found, (state, min_text, max_text, modal_text)
+        count += 1
+    print(f"Extracted {count} table rows")
+    tracing.count("rows", count)
+    if unknown:
+        print(f"Warning: Dropped {sum(unknown.values())} rows naming unknown commodities: "
+              + ", ".join(f"{text or '(blank)'} ×{n}" for text, n in unknown.items()))
+        tracing.count("rows_dropped", sum(unknown.values()), reason="commodity")
+    record_step(f"{commodity} row extraction", started)
+
+async def stream_rows(commodities=None, browser=None):
+    # (commodity, row) straight off the page: the page, the state/unit/scroll
+    # filters and the browser context are set up once, then only the
+    # commodity dropdown changes between commodities
+    commodities = commodities or commodity_registry.SELECTED
+    found = set()
+    journal = run_journal.get_journal()
+
+    # Tables an earlier attempt of this run already read come from the journal
+    for commodity in commodities:
+        for name, row in (journal.get("mandiprices", commodity) if journal else None) or []:
+            found.add(name)
+            yield name, tuple(row)
+    commodities = [commodity for commodity in commodities if commodity not in found]
+    if not commodities:
+        return
+
+    async def read(page, commodity):
+        # One commodity's table, journaled once it has been read in full
+        rows = []
+        async for name, row in iter_table(page, commodity):
+            found.add(name)
+            rows.append((name, row))
+            yield name, row
+        if journal and rows:
+            journal.record("mandiprices", commodity, rows)
+
+    async with browser_context(browser, launch_options={"headless": True}, state=SAVED_STATE) as context:
+        await NETWORK_POLICY.install(context)
+        page = await context.new_page()
+
+        step_latency.clear()
         try:
-            await retry(lambda: page.goto("https://www.mandiprices.in/", timeout=60000), "navigate to site")
+            first = commodity_registry.label(commodities[0])
+            started = time.perf_counter()
+            with tracing.span("page.goto"):
+                await retry(lambda: page.goto(f"{BASE_URL}/", timeout=60000), "navigate to site")
             await retry(lambda: page.locator('xpath=//button[@role="combobox"]').first.wait_for(state="visible", timeout=10000), "wait for page to stabilize")
-            await wait_random("after page load")
-
-            await select_by_label(page, "All Commodities", "Potato")
-            await select_by_label(page, "All States", "All States")
-            await select_by_label(page, "Price in Kg", "Price in Quintal")
-            await select_by_label(page, "Paginated", "Scroll")
-
-            await retry(lambda: page.locator('xpath=//table//tbody//tr').first.wait_for(state="visible", timeout=10000), "wait for table to appear")
-            await wait_random("after table appears")
+            record_step("page load", started)
+            await settle(page, "settle after page load")
 
-            rows = await page.query_selector_all('xpath=//table//tbody//tr')
-            print(f"Found {len(rows)} table rows")
-
-            raw_data = []
-            for idx, row in enumerate(rows):
-                try:
-                    cols = await row.query_selector_all("xpath=.//td")
-                    if len(cols) < 11:
-                        continue
-                    try:
-                        text = [await col.inner_text() for col in cols]
-                    except Exception as e:
-                        print(f"Error: Failed to extract row #{idx}: {e}")
-                        continue
-
-                    raw_data.append({
-                        "State": text[1].strip(),
-                        "Minimum_Price": parse_price(text[8]),
-                        "Maximum_Price": parse_price(text[9]),
-                        "Modal_Price": parse_price(text[10])
-                    })
-                except Exception as e:
-                    print(f"Error: Row #{idx} failed: {e}")
-                    continue
+            await select_by_label(page, "All Commodities", first, commodity=first)
+            await select_by_label(page, "All States", "All States", commodity=first)
+            await select_by_label(page, "Price in Kg", "Price in Quintal", commodity=first)
+            await select_by_label(page, "Paginated", "Scroll", commodity=first)
+            async for name, row in read(page, commodities[0]):
+                yield name, row
 
         except Exception as e:
             print(f"Critical scrape failure: {e}")
-            await browser.close()
-            return []
-
-        await browser.close()
-
-        grouped = defaultdict(list)
-        for item in raw_data:
-            grouped[item["State"]].append(item)
-
-        averaged_data = []
-        for state, items in grouped.items():
-            min_vals = [i["Minimum_Price"] for i in items if i["Minimum_Price"] and i["Minimum_Price"] <= 5500]
-            max_vals = [i["Maximum_Price"] for i in items if i["Maximum_Price"] and i["Maximum_Price"] <= 5500]
-            modal_vals = [i["Modal_Price"] for i in items if i["Modal_Price"] and i["Modal_Price"] <= 5500]
-
-            averaged_data.append({
-                "State": state,
-                "Minimum_Price": round(mean(min_vals)) if min_vals else 0,
-                "Maximum_Price": round(mean(max_vals)) if max_vals else 0,
-                "Current_Price": round(mean(modal_vals)) if modal_vals else 0
-            })
-
-        states = [
-            "andhra-pradesh", "arunachal-pradesh", "assam", "bihar", "chattisgarh",
-            "delhi", "gujarat", "haryana", "himachal-pradesh", "jharkhand",
-            "karnataka", "kerala", "madhya-pradesh", "maharashtra", "manipur",
-            "meghalaya", "mizoram", "nagaland", "odisha", "punjab",
-            "rajasthan", "sikkim", "tamil-nadu", "telangana", "tripura",
-            "uttar-pradesh", "uttrakhand", "west-bengal"
-        ]
-
-        mapping = {"nct-of-delhi": "delhi", "uttarakhand": "uttrakhand"}
-        normalized = {}
-
-        for item in averaged_data:
-            raw = item["State"].strip().lower().replace(" ", "-")
-            name = mapping.get(raw, raw)
-            normalized[name] = {
-                "State": name,
-                "Minimum_Price": item["Minimum_Price"],
-                "Maximum_Price": item["Maximum_Price"],
-                "Current_Price": item["Current_Price"]
-            }
-
-        final = []
-        for state in sorted(states):
-            final.append(normalized.get(state, {
-                "State": state,
-                "Minimum_Price": 0,
-                "Maximum_Price": 0,
-                "Current_Price": 0
-            }))
-
-        print("Scraping complete. Final results prepared.")
-        return final if return_results else None
+            return
+        finally:
+            NETWORK_POLICY.report()
+
+        previous = first
+        for commodity in commodities[1:]:
+            if commodity in found:
+                continue  # already came with an earlier table
+            try:
+                # The commodity dropdown now shows the previous commodity's name
+                await select_by_label(page, previous, commodity_registry.label(commodity), commodity=commodity_registry.label(commodity))
+                async for name, row in read(page, commodity):
+                    yield name, row
+                previous = commodity_registry.label(commodity)
+            except Exception as e:
+                # A failed selection reads nothing, so the commodity is skipped for this run
+                print(f"Scrape failure for {commodity}, skipping: {e}")
+
+        report_step_latency()
+
+async def scrape_mandiprices_commodities(commodities=None, browser=None, on_commodity=None, only_states=None):
+    # {commodity: per-state records}; on_commodity(commodity, records) sees
+    # each one as soon as it is summarized
+    commodities = commodities or commodity_registry.SELECTED
+
+    def finish(commodity, rows):
+        # A mixed table can carry commodities nobody asked for
+        return summarize(rows, only_states) if commodity in commodities else None
+
+    results = await streaming.collect(stream_rows(commodities, browser), finish, on_commodity)
+    print("Scraping complete. Final results prepared.")
+    return results
+
+async def scrape_mandiprices(return_results=False, browser=None, commodity=None):
+    commodity = commodity or commodity_registry.DEFAULT_COMMODITY
+    results = await scrape_mandiprices_commodities([commodity], browser)
+    return results.get(commodity, []) if return_results else None
 
 if __name__ == "__main__":
+    import sys
+    sys.stdout.reconfigure(encoding='utf-8')
+    sys.stderr.reconfigure(encoding='utf-8')
     asyncio.run(scrape_mandiprices())
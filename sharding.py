@@ -0,0 +1,130 @@
+import glob
+import hashlib
+import json
+import os
+
+# Shard mode: K processes (or K CI matrix jobs) each run `scrape_all.py
+# --shard i/K`, fetch their share of the states and write a partial file here;
+# `scrape_all.py --merge` then publishes exactly what one process would have
+SHARD_DIR = os.getenv("SCRAPER_SHARD_DIR", os.path.join(".cache", "shards"))
+
+
+def _rank(name):
+    # Stable across processes, machines and Python versions (unlike hash())
+    return hashlib.sha256(name.encode("utf-8")).hexdigest()
+
+
+def deal(names, index, count):
+    # Shard `index` of `count`: names ordered by their hash and dealt out round
+    # robin, so every shard gets len(names) / count of them, give or take one,
+    # and the split only depends on the names themselves
+    return [name for i, name in enumerate(sorted(names, key=_rank)) if i % count == index]
+
+
+def parse(text):
+    # "1/4" -> (1, 4); shards are numbered from 0 like a CI matrix index
+    try:
+        index, count = (int(part) for part in text.split("/"))
+    except ValueError:
+        raise ValueError(f"Shard '{text}' is not <index>/<count>") from None
+    if not 0 <= index < count:
+        raise ValueError(f"Shard index must be in 0..{count - 1}, got {index}")
+    return index, count
+
+
+def name(index, count):
+    return f"shard-{index}-of-{count}"
+
+
+def write_partial(directory, partial):
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{name(partial['shard'], partial['count'])}.json")
+    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+        json.dump(partial, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(f"{path}.tmp", path)
+    return path
+
+
+def load_partials(directory):
+    # Every partial of one sharded run, ordered by shard
+    partials = []
+    for path in sorted(glob.glob(os.path.join(directory, "shard-*-of-*.json"))):
+        with open(path, encoding="utf-8") as f:
+            partials.append(json.load(f))
+    if not partials:
+        raise RuntimeError(f"No shard partials in {directory}")
+    first = partials[0]
+    for partial in partials[1:]:
+        for field in ("count", "commodities", "sources", "states"):
+            if partial[field] != first[field]:
+                raise RuntimeError(f"Shard partials in {directory} disagree on {field}: "
+                                   f"{first[field]} vs {partial[field]}")
+    return sorted(partials, key=lambda partial: partial["shard"])
+
+
+def merge_outcome(outcomes, count=None):
+    # One outcome for a source out of the shards that ran it: the slowest
+    # shard's time, the common status if they agree, else partial with each
+    # shard's status (keyed by shard name when the shard count is given)
+    if not outcomes:
+        return {"status": "failed", "seconds": 0.0, "error": "no shard ran it"}
+    statuses = {name(shard, count) if count else shard: outcome["status"] for shard, outcome in outcomes}
+    merged = dict(outcomes[0][1])
+    merged["seconds"] = max(outcome["seconds"] for _, outcome in outcomes)
+    if len(set(statuses.values())) > 1:
+        merged = {"status": "partial", "seconds": merged["seconds"], "shards": statuses}
+    return merged
+
+
+def merge(partials, finish, states):
+    # ({source: {commodity: result} or None}, {source: outcome}, shard
+    # summaries, {source: {commodity: lost states}}) for the whole run.
+    # Sharded sources hand in unfinished items, which go through
+    # finish(source, commodity, items, lost) here over every state at once,
+    # exactly as a single process would have. `lost` are the states(source)
+    # dealt to a shard that failed, or wrote no partial, and returned no items
+    # for them: whatever finish() makes of those is not this run's data
+    first = partials[0]
+    count = first["count"]
+    present = {partial["shard"] for partial in partials}
+    gathered = {key: {} for key in first["sources"]}
+    outcomes = {key: [] for key in first["sources"]}
+    owned = {key: set() for key in first["sharded"]}
+
+    for partial in partials:
+        for key, entry in partial["results"].items():
+            outcomes[key].append((partial["shard"], entry["outcome"]))
+            if entry["sharded"] and entry["outcome"]["status"] != "ok":
+                owned[key].update(entry["states"])
+            for commodity, data in entry["data"].items():
+                if entry["sharded"]:
+                    gathered[key].setdefault(commodity, []).extend(data)
+                else:
+                    gathered[key][commodity] = data
+
+    # A shard that never wrote its partial lost every source it was meant to run
+    for shard in sorted(set(range(count)) - present):
+        print(f"⚠️ No partial from {name(shard, count)}", flush=True)
+        for key in first["sources"]:
+            if key in first["sharded"] or key in deal(first["whole"], shard, count):
+                outcomes[key].append((shard, {"status": "failed", "seconds": 0.0, "error": f"{name(shard, count)} wrote no partial"}))
+            if key in first["sharded"]:
+                owned[key].update(deal(states(key), shard, count))
+
+    finished, merged, lost = {}, {}, {}
+    for key in first["sources"]:
+        data = gathered[key]
+        if key in first["sharded"]:
+            lost[key] = {
+                commodity: sorted(owned[key] - {item.get("State") for item in items})
+                for commodity, items in data.items()
+            }
+            data = {commodity: finish(key, commodity, items, lost[key][commodity]) for commodity, items in data.items()}
+        finished[key] = {commodity: result for commodity, result in data.items() if result} or None
+        merged[key] = merge_outcome(sorted(outcomes[key], key=lambda pair: pair[0]), count)
+        if finished[key] and merged[key]["status"] == "ok":
+            missing = [commodity for commodity in first["commodities"] if not finished[key].get(commodity)]
+            if missing:
+                merged[key] = {**merged[key], "status": "partial", "missing": missing}
+    shards = {name(partial["shard"], count): partial["run"] for partial in partials}
+    return finished, merged, shards, lost
@@ -0,0 +1,142 @@
+import asyncio
+import json
+import os
+import threading
+import time
+
+import tracing
+
+# Wall-clock budget for the whole run, in seconds; whatever is still running
+# when it expires is cancelled and the rest is published
+RUN_DEADLINE = float(os.getenv("SCRAPER_RUN_DEADLINE", "1800"))
+
+# Per-source budgets in seconds, overridable as SCRAPER_BUDGET_<SOURCE>. The
+# agmarknet browser path alone can spend 5 attempts x 3 table waits x 20s
+DEFAULT_BUDGETS = {
+    "commoditymarketlive": 420,
+    "commodityonline": 420,
+    "mandiprices": 600,
+    "agmarknet": 900,
+}
+
+# Consecutive failed runs after which a source is skipped, and how long it
+# stays skipped before a single trial run is allowed again
+BREAKER_FAILURES = int(os.getenv("SCRAPER_BREAKER_FAILURES", "3"))
+BREAKER_COOLDOWN = float(os.getenv("SCRAPER_BREAKER_COOLDOWN", str(24 * 3600)))
+HEALTH_FILE = os.getenv("SCRAPER_HEALTH_FILE", os.path.join(".cache", "source_health.json"))
+
+
+def budget_for(key):
+    return float(os.getenv(f"SCRAPER_BUDGET_{key.upper()}", DEFAULT_BUDGETS.get(key, RUN_DEADLINE)))
+
+
+class CircuitBreaker:
+    # Failure streaks per source, kept between runs in HEALTH_FILE. A source
+    # whose streak reached `failures` is open (skipped) until `cooldown` has
+    # passed since its last failure; then one run is let through, and a success
+    # closes the breaker again
+    def __init__(self, path=HEALTH_FILE, failures=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.path = path
+        self.failures = failures
+        self.cooldown = cooldown
+        self.health = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.health = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def is_open(self, key, now=None):
+        entry = self.health.get(key, {})
+        if self.failures <= 0 or entry.get("streak", 0) < self.failures:
+            return False
+        return (now or time.time()) - entry.get("last_failure", 0) < self.cooldown
+
+    def record(self, key, ok, now=None):
+        entry = self.health.setdefault(key, {"streak": 0})
+        if ok:
+            entry["streak"] = 0
+            entry["last_success"] = now or time.time()
+        else:
+            entry["streak"] = entry.get("streak", 0) + 1
+            entry["last_failure"] = now or time.time()
+
+    def save(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # Shards of one run save the same file at once; each writes its own temp file
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.health, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+class RunGuard:
+    # Runs each source under min(its budget, what is left of the run deadline),
+    # consults the breaker first, and keeps one outcome per source:
+    # ok / partial / timeout / failed / skipped plus the seconds it took
+    def __init__(self, deadline=RUN_DEADLINE, breaker=None):
+        self.deadline = deadline
+        self.breaker = breaker or CircuitBreaker()
+        self.started = time.monotonic()
+        self.outcomes = {}
+        self._lock = threading.Lock()
+
+    def remaining(self):
+        return max(0.0, self.deadline - (time.monotonic() - self.started))
+
+    def budget(self, key):
+        return min(budget_for(key), self.remaining())
+
+    def finish(self, key, status, seconds, **details):
+        with self._lock:
+            self.outcomes[key] = {"status": status, "seconds": round(seconds, 2), **details}
+        if status != "skipped":
+            self.breaker.record(key, status in ("ok", "partial"))
+
+    async def run(self, key, label, make):
+        # make() returns the scrape coroutine; None means nothing to publish
+        if self.breaker.is_open(key):
+            print(f"⏭️ Skipping {label}: failed {self.breaker.health[key]['streak']} runs in a row", flush=True)
+            self.finish(key, "skipped", 0.0)
+            tracing.count("breaker_skips", source=key)
+            return None
+        budget = self.budget(key)
+        start = time.perf_counter()
+        print(f"Starting {label} scraper ({budget:.0f}s budget)", flush=True)
+        try:
+            with tracing.span("source", source=key):
+                result = await asyncio.wait_for(make(), budget)
+        except asyncio.TimeoutError:
+            print(f"⏰ {label} scraper overran its {budget:.0f}s budget and was cancelled", flush=True)
+            self.finish(key, "timeout", time.perf_counter() - start, budget=round(budget))
+            return None
+        except Exception as e:
+            print(f"Error in {label} scraper: {e}", flush=True)
+            self.finish(key, "failed", time.perf_counter() - start, error=(str(e).splitlines() or [""])[0][:200])
+            return None
+        self.finish(key, "ok" if result else "failed", time.perf_counter() - start)
+        return result
+
+    def mark_partial(self, key, missing):
+        # A source that returned but without some of what it was asked for
+        with self._lock:
+            outcome = self.outcomes.get(key)
+            if outcome and outcome["status"] == "ok" and missing:
+                outcome["status"] = "partial"
+                outcome["missing"] = missing
+
+    def abandon(self, keys, status="timeout"):
+        # Sources whose thread is still running when the run deadline is up, or
+        # that never started at all
+        for key in keys:
+            if key not in self.outcomes:
+                self.finish(key, status, time.monotonic() - self.started)
+
+    def summary(self):
+        return {
+            "deadline_s": self.deadline,
+            "elapsed_s": round(time.monotonic() - self.started, 2),
+            "sources": dict(self.outcomes),
+        }
@@ -0,0 +1,106 @@
+import importlib
+import os
+
+# Every source scrape_all can run: its display label, the module behind it and
+# that module's entry point, and the file its output is published as (for the
+# default commodity; the others get a _<commodity> suffix). A module is only
+# imported once its source is picked, so a run of one source never pays for
+# the others' imports. A sharded source fetches one page per state, so its
+# `states` can be split across shards (see sharding.py); the others read one
+# table covering every state and run whole in one shard
+SOURCES = {
+    "commoditymarketlive": {
+        "label": "CommodityMarketLive",
+        "module": "scrape_commoditymarketlive_com",
+        "entry": "scrape_commodities",
+        "output": "result_commoditymarketlive_in.json",
+        "sharded": True,
+    },
+    "commodityonline": {
+        "label": "CommodityOnline",
+        "module": "scrape_commodityonline_com",
+        "entry": "scrape_commodities",
+        "output": "result_commodityonline_in.json",
+        "sharded": True,
+    },
+    "mandiprices": {
+        "label": "MandiPrices",
+        "module": "scrape_mandiprices_in",
+        "entry": "scrape_mandiprices_commodities",
+        "output": "result_mandiprices_in.json",
+        "sharded": False,
+    },
+    "agmarknet": {
+        "label": "Agmarknet",
+        "module": "scrape_agmarknet_gov_in",
+        "entry": "scrape_commodities",
+        "output": "result_agmarknet_gov_in.json",
+        "sharded": False,
+    },
+}
+
+
+def parse_list(text):
+    # Empty means every source
+    names = []
+    for name in (text or "").split(","):
+        name = name.strip().lower()
+        if not name:
+            continue
+        if name not in SOURCES:
+            raise ValueError(f"Unknown source '{name}' (known: {', '.join(SOURCES)})")
+        if name not in names:
+            names.append(name)
+    return names or list(SOURCES)
+
+
+def parse_states(text):
+    # State slugs as the sources publish them ("uttar-pradesh"); None means all
+    names = []
+    for name in (text or "").split(","):
+        name = name.strip().lower().replace(" ", "-")
+        if name and name not in names:
+            names.append(name)
+    return names or None
+
+
+def check_states(states):
+    # Every slug must be one the per-state sources know; a typo would
+    # otherwise fetch nothing and count each source as failed
+    if not states:
+        return states
+    known = {state for key in SOURCES if sharded(key) for state in module(key).states}
+    unknown = [state for state in states if state not in known]
+    if unknown:
+        raise ValueError(f"Unknown state(s) {', '.join(unknown)} (known: {', '.join(sorted(known))})")
+    return states
+
+
+# Sources run and states fetched per run, e.g. SCRAPER_SOURCES=agmarknet,mandiprices
+# and SCRAPER_STATES=punjab,haryana
+SELECTED = parse_list(os.getenv("SCRAPER_SOURCES"))
+STATES = parse_states(os.getenv("SCRAPER_STATES"))
+
+
+def label(key):
+    return SOURCES[key]["label"]
+
+
+def output(key):
+    return SOURCES[key]["output"]
+
+
+def sharded(key):
+    return SOURCES[key]["sharded"]
+
+
+def module(key):
+    return importlib.import_module(SOURCES[key]["module"])
+
+
+def load(key):
+    # The source's scrape function, called as
+    # scrape(commodities, browser=..., on_commodity=..., only_states=...).
+    # A sharded source's module also has `states`, finish_commodity(commodity,
+    # items) and takes finish=... to hand back its items unfinished
+    return getattr(module(key), SOURCES[key]["entry"])
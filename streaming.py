@@ -0,0 +1,83 @@
+import asyncio
+import os
+
+# Items buffered between a scraper and whatever consumes its stream; once the
+# queue is full the scraper waits at its next yield until the consumer catches up
+QUEUE_SIZE = int(os.getenv("SCRAPER_STREAM_QUEUE", "64"))
+
+# Yielded by a source as (commodity, DONE) once nothing more will come for that
+# commodity, so its result can be finished and written before the run ends
+DONE = object()
+
+
+async def drain(queue, task):
+    # Items `task` puts on `queue`, until the task is over and the queue empty;
+    # an error in the task is raised here after its last item
+    getter = None
+    try:
+        while not task.done():
+            if not queue.empty():
+                yield queue.get_nowait()
+                continue
+            getter = asyncio.ensure_future(queue.get())
+            await asyncio.wait({getter, task}, return_when=asyncio.FIRST_COMPLETED)
+            if getter.done():
+                yield getter.result()
+            else:
+                getter.cancel()
+        while not queue.empty():
+            yield queue.get_nowait()
+        task.result()
+    finally:
+        if getter is not None:
+            getter.cancel()
+        task.cancel()
+
+
+async def bounded(stream, maxsize=None):
+    # Re-yields an async generator that runs ahead in its own task, at most
+    # `maxsize` items ahead of the consumer. Cancelling the consumer cancels
+    # the producer, which unwinds its pages and contexts as usual
+    queue = asyncio.Queue(maxsize or QUEUE_SIZE)
+
+    async def produce():
+        try:
+            async for item in stream:
+                await queue.put(item)
+        finally:
+            # Cancelled while waiting on a full queue the stream sits at a
+            # yield, so its own cleanup only runs when it is closed
+            await stream.aclose()
+
+    items = drain(queue, asyncio.ensure_future(produce()))
+    try:
+        async for item in items:
+            yield item
+    finally:
+        await items.aclose()
+
+
+async def collect(stream, finish, on_commodity=None, maxsize=None):
+    # The list-returning end of a source: groups the (commodity, item) pairs
+    # of `stream`, turns a commodity's items into its result with
+    # finish(commodity, items) as soon as it is DONE (the rest when the stream
+    # ends) and hands every non-empty result to on_commodity(commodity, result).
+    # Returns {commodity: result}
+    items, results = {}, {}
+
+    def complete(commodity):
+        result = finish(commodity, items.pop(commodity))
+        if result:
+            results[commodity] = result
+            if on_commodity:
+                on_commodity(commodity, result)
+
+    async for commodity, item in bounded(stream, maxsize):
+        if item is DONE:
+            if commodity in items:
+                complete(commodity)
+        else:
+            items.setdefault(commodity, []).append(item)
+    for commodity in list(items):
+        complete(commodity)
+    return results
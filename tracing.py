@@ -0,0 +1,171 @@
+import asyncio
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+# Timing spans and counters for the scraper stages, exported next to
+# status_report.json as Prometheus text (metrics.prom) and a Chrome/Perfetto
+# trace (trace.json). With SCRAPER_TRACE=0 span() hands back one shared
+# no-op context and count() returns straight away
+ENABLED = os.getenv("SCRAPER_TRACE", "1") != "0"
+# Individual spans kept for the trace; totals keep counting past it
+MAX_SPANS = int(os.getenv("SCRAPER_TRACE_MAX_SPANS", "20000"))
+
+PROMETHEUS_FILE = "metrics.prom"
+TRACE_FILE = "trace.json"
+
+_NULL = nullcontext()
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_origin = time.perf_counter()
+_spans = []
+# (name, labels) -> [count, total seconds, max seconds]
+_totals = defaultdict(lambda: [0, 0.0, 0.0])
+# (name, labels) -> value
+_counters = defaultdict(float)
+# (span id, labels) of the innermost open span in this task or thread
+_current = contextvars.ContextVar("tracing_current", default=(0, {}))
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def _inherit(labels):
+    # The source a span runs under sticks to everything nested inside it
+    parent, parent_labels = _current.get()
+    if "source" in parent_labels and "source" not in labels:
+        labels = {"source": parent_labels["source"], **labels}
+    return parent, labels
+
+
+@contextmanager
+def _span(name, labels):
+    parent, labels = _inherit(labels)
+    span_id = next(_ids)
+    token = _current.set((span_id, labels))
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - start
+        try:
+            _current.reset(token)
+        except ValueError:
+            pass  # closed from another task (an async generator finalized elsewhere)
+        with _lock:
+            total = _totals[_key(name, labels)]
+            total[0] += 1
+            total[1] += seconds
+            total[2] = max(total[2], seconds)
+            if len(_spans) < MAX_SPANS:
+                _spans.append((span_id, parent, name, labels, start - _origin, seconds, threading.get_ident()))
+
+
+def span(name, **labels):
+    # with tracing.span("page.goto", source="agmarknet"): ... (await inside is fine)
+    if not ENABLED:
+        return _NULL
+    return _span(name, labels)
+
+
+def count(name, n=1, **labels):
+    # Adds n to a counter such as retries, bytes or rows
+    if not ENABLED:
+        return
+    _, labels = _inherit(labels)
+    with _lock:
+        _counters[_key(name, labels)] += n
+
+
+async def sleep(seconds):
+    # asyncio.sleep that shows up in the trace as deliberate waiting
+    with span("sleep"):
+        await asyncio.sleep(seconds)
+
+
+def reset():
+    global _origin
+    with _lock:
+        _spans.clear()
+        _totals.clear()
+        _counters.clear()
+        _origin = time.perf_counter()
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in labels) + "}"
+
+
+def prometheus_text():
+    with _lock:
+        totals = dict(_totals)
+        counters = dict(_counters)
+    lines = [
+        "# HELP scraper_span_seconds Time spent in each scraper stage",
+        "# TYPE scraper_span_seconds summary",
+    ]
+    for (name, labels), (calls, seconds, _) in sorted(totals.items()):
+        text = _labels_text((("span", name),) + labels)
+        lines.append(f"scraper_span_seconds_sum{text} {seconds:.6f}")
+        lines.append(f"scraper_span_seconds_count{text} {calls}")
+    lines += [
+        "# HELP scraper_span_max_seconds Slowest single occurrence of each stage",
+        "# TYPE scraper_span_max_seconds gauge",
+    ]
+    for (name, labels), (_, _, longest) in sorted(totals.items()):
+        lines.append(f"scraper_span_max_seconds{_labels_text((('span', name),) + labels)} {longest:.6f}")
+    for name in sorted({name for name, _ in counters}):
+        lines += [f"# TYPE scraper_{name}_total counter"]
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f"scraper_{name}_total{_labels_text(labels)} {value:g}")
+    return "\n".join(lines) + "\n"
+
+
+def trace_events():
+    # Complete ("X") events in microseconds, one track per thread
+    with _lock:
+        spans = list(_spans)
+        counters = dict(_counters)
+        recorded = sum(total[0] for total in _totals.values())
+    events = [
+        {
+            "name": name, "ph": "X", "pid": os.getpid(), "tid": thread,
+            "ts": round(start * 1e6), "dur": round(seconds * 1e6),
+            "args": {**labels, "id": span_id, "parent": parent},
+        }
+        for span_id, parent, name, labels, start, seconds, thread in spans
+    ]
+    return {
+        "traceEvents": events,
+        "otherData": {
+            "dropped_spans": recorded - len(spans),
+            "counters": [{"name": name, **dict(labels), "value": value} for (name, labels), value in sorted(counters.items())],
+        },
+    }
+
+
+def write(directory):
+    # metrics.prom and trace.json into `directory`; nothing when disabled
+    if not ENABLED:
+        return []
+    paths = []
+    for name, text in ((PROMETHEUS_FILE, prometheus_text()), (TRACE_FILE, json.dumps(trace_events()))):
+        path = os.path.join(directory, name)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(f"{path}.tmp", path)
+        paths.append(path)
+    return paths